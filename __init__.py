@@ -1,35 +1,52 @@
 import re
+import time
 import shlex
 import asyncio
-import base64
 from io import BytesIO
+from functools import partial
 from dataclasses import dataclass
-from asyncio import TimerHandle
-from tracemalloc import stop
-from typing import Dict, List, Optional, NoReturn
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, NoReturn
 
 import json
-from fuzzywuzzy import process
 
 import hoshino
-from hoshino import Service
+from hoshino import Service, priv
 from hoshino.typing import CQEvent, HoshinoBot
 
+import nonebot
 from nonebot import MessageSegment
 
-from .utils import dic_list, random_word, get_word_list
+from .utils import dic_list, random_word
+from .candidates import difficulties
+from .suggest import get_suggest_index
 from .data_source import Wordle, GuessResult, min_len, max_len
+from .render_pool import render_pool, RenderBusy
+from .image_files import image_files
+from .image_cache import image_cache
+from .legality import checker
+from .timeouts import TimeoutSweeper
+from .chat_queue import ChatLocks, BoardUpdates
+from .store import GameStore
+from .warmup import warm_up_later
+from .engine import EnginePool, EngineUnavailable, event_target
+from .metrics import metrics
+from .profiler import profiler, ProfilerBusy
+from . import config
+from . import solver
 
 HELP_MSG = f'''
 指令列表（发送时不含尖括号）：
 
-开始游戏指令：猜单词<字母数(默认为5)> <来源词库(默认为CET4)>
+开始游戏指令：猜单词<字母数(默认为5)> <来源词库(默认为CET4)> <难度(可选)>
 支持的词典：CET4 CET6 GMAT GRE IELTS SAT TOEFL 专八 专四 考研
+支持的难度：简单（无重复字母且不含jqxz） 困难
 
 猜单词指令：我猜<单词>
 或直接发送<单词>，但仅响应字母位数正确的单词
 
 提示指令：猜单词提示
+推荐下一个猜测：猜单词推荐
 终止游戏指令：猜单词结束
 
 绿色块代表此单词中有此字母且位置正确；
@@ -38,7 +55,8 @@ HELP_MSG = f'''
 特别的，若猜测单词中出现x个相同的字母，但只有y个颜色为灰色时，表示原单词中存在x-y个该字母。
 
 提示中的灰色块表示肯定不会在原单词中出现的字母；
-提示中的蓝色块表示在所有猜测单词中从未出现的字母。
+提示中的蓝色块表示在所有猜测单词中从未出现的字母；
+提示中的“#”表示词库中仍符合所有猜测结果的单词数。
 '''.strip()
 
 sv = hoshino.Service('猜单词', visible=True, enable_on_default=True, help_=HELP_MSG)
@@ -60,15 +78,19 @@ async def wordleHelp(bot, ev: CQEvent):
 class Options:
     length: int = 0
     dic: str = ""
+    difficulty: str = ""
     hint: bool = False
+    best: bool = False
     stop: bool = False
     word: str = ""
 
 
 games: Dict[str, Wordle] = {}
-timers: Dict[str, TimerHandle] = {}
 
-words_by_len = get_word_list()
+# 按群号/QQ号记录进行中游戏的单词长度，供 on_message 快速跳过无游戏的会话
+group_lengths: Dict[int, int] = {}
+private_lengths: Dict[int, int] = {}
+guess_patterns = {i: re.compile(rf"\s*[a-zA-Z]{{{i}}}\s*") for i in range(min_len, max_len + 1)}
 
 
 def get_cid(event):
@@ -76,22 +98,55 @@ def get_cid(event):
 
 
 def game_running(event) -> bool:
-    cid = get_cid(event)
-    return bool(games.get(cid, None))
+    # 分片模式下游戏在工作进程中，主进程只有各会话的单词长度
+    return active_length(event) is not None
+
+
+def active_length(event) -> Optional[int]:
+    # CQEvent 是 dict，直接取键比属性访问（经由 __getattr__）快得多
+    group_id = event.get("group_id")
+    if group_id:
+        return group_lengths.get(group_id, None)
+    return private_lengths.get(event.get("user_id"), None)
+
+
+def set_length(group_id: Optional[int], user_id: Optional[int], length: Optional[int]):
+    lengths, key = (group_lengths, group_id) if group_id else (private_lengths, user_id)
+    if length is None:
+        lengths.pop(key, None)
+    else:
+        lengths[key] = length
+    if engine_link is not None:
+        engine_link.put(("length", group_id, user_id, length))
+
+
+def add_game(event, cid: str, game: Wordle):
+    games[cid] = game
+    set_length(event.group_id, event.user_id, game.length)
+
+
+def pop_game(event, cid: str) -> Optional[Wordle]:
+    sweeper.discard(cid)
+    board_updates.cancel(cid)
+    if store:
+        store.delete(cid)
+    set_length(event.group_id, event.user_id, None)
+    return games.pop(cid, None)
 
 
 @sv.on_prefix('猜单词', 'wordle')
 async def _(bot, ev: CQEvent):
-    cid = get_cid(ev)
-    if games.get(cid, None):
+    if game_running(ev):
         await bot.send(ev, "已有游戏进行中\n如需终止，请发送“猜单词结束”")
     else:
         args = ev.message.extract_plain_text().split()
         args = [i.upper() for i in args]
         argv = []
+        if args and args[-1] in difficulties:
+            argv += ["--difficulty", args.pop()]
         if len(args) == 0:
             # print('0参数')
-            await handle_wordle(bot, ev, ["--length", "5", "--dic", "CET4"])
+            await handle_wordle(bot, ev, argv + ["--length", "5", "--dic", "CET4"])
         elif len(args) == 1:
             # print('1参数')
             if args[0].isdigit():
@@ -130,6 +185,11 @@ async def _(bot, ev):
     await handle_wordle(bot, ev, ["--hint"])
 
 
+@sv.on_fullmatch('猜单词推荐')
+async def _(bot, ev):
+    await handle_wordle(bot, ev, ["--best"])
+
+
 @sv.on_fullmatch('猜单词结束')
 async def _(bot, ev):
     await handle_wordle(bot, ev, ["--stop"])
@@ -142,57 +202,220 @@ async def _(bot, ev):
         await handle_wordle(bot, ev, [text])
 
 
+@sv.on_fullmatch('猜单词统计')
+async def _(bot, ev):
+    if not priv.check_priv(ev, priv.SUPERUSER):
+        await bot.finish(ev, "仅超级用户可以查看统计")
+    msg = metrics.summary()
+    if not metrics.enabled:
+        msg = "未开启运行指标（METRICS_ENABLED），仅有以下统计\n" + msg
+    await bot.send(ev, msg)
+
+
+async def run_profiler(bot, ev, analyse: Callable, title: str):
+    if not priv.check_priv(ev, priv.SUPERUSER):
+        await bot.finish(ev, "仅超级用户可以进行性能分析")
+    arg = ev.message.extract_plain_text().strip()
+    seconds = min(int(arg), config.PROFILE_MAX_SECONDS) if arg.isdigit() else config.PROFILE_DEFAULT_SECONDS
+    if profiler.running:
+        await bot.finish(ev, "已有分析在进行中")
+    await bot.send(ev, f"开始{title}，持续{seconds}秒")
+    try:
+        path, msg = await analyse(seconds)
+    except ProfilerBusy:
+        await bot.finish(ev, "已有分析在进行中")
+    await bot.send(ev, f"{msg}\n报告：{path}")
+
+
+@sv.on_prefix('猜单词性能分析')
+async def _(bot, ev):
+    await run_profiler(bot, ev, profiler.sample, "性能分析")
+
+
+@sv.on_prefix('猜单词内存分析')
+async def _(bot, ev):
+    await run_profiler(bot, ev, profiler.memory, "内存分析")
+
+
 @sv.on_message()
 async def _(bot, ev):
-    text = str(ev.message).strip()
-    if min_len <= len(text) <= max_len:
-        if re.fullmatch(r"^[a-zA-Z]+$", text) is not None:
-            await handle_wordle(bot, ev, [text], no_response=True)
+    # 绝大多数消息来自没有游戏的会话，此时只做一次整数键查询
+    length = active_length(ev)
+    if length is None:
+        return
+    text = str(ev.message)
+    if guess_patterns[length].fullmatch(text) is not None:
+        await handle_wordle(bot, ev, [text.strip()], no_response=True)
 
 
-async def stop_game(bot, ev, cid: str):
-    timers.pop(cid, None)
+async def stop_game(cid: str, context):
+    bot, ev = context
     if games.get(cid, None):
-        game = games.pop(cid)
+        game = pop_game(ev, cid)
+        metrics.inc("wordle_timeouts_total")
         msg = "猜单词超时，游戏结束"
         if len(game.guessed_words) >= 1:
             msg += f"\n{game.result}"
-        await bot.finish(ev, msg)
+        await bot.send(ev, msg)
+
+
+sweeper = TimeoutSweeper(config.GAME_TIMEOUT, config.TIMEOUT_SWEEP_INTERVAL, stop_game)
+
+
+async def send_board(cid: str, context):
+    # 连续猜测合并后的棋盘，按发送时的最新局面绘制
+    bot, ev = context
+    game = games.get(cid, None)
+    if game is None:
+        return
+    try:
+        image = await render_pool.render(game.draw)
+    except RenderBusy:
+        await bot.send(ev, "当前绘图任务过多，请稍后再试")
+        return
+    with metrics.timer("send"):
+        await bot.send(ev, f'{MessageSegment.image(image)}')
+
 
+board_updates = BoardUpdates(config.BOARD_COALESCE_DELAY, send_board)
+chat_locks = ChatLocks()
 
-def set_timeout(bot, ev, cid: str, timeout: float = 300):
-    timer = timers.get(cid, None)
-    if timer:
-        timer.cancel()
-    loop = asyncio.get_running_loop()
-    timer = loop.call_later(
-        timeout, lambda: asyncio.ensure_future(stop_game(bot, ev, cid))
-    )
-    timers[cid] = timer
+
+def set_timeout(bot, ev, cid: str):
+    sweeper.touch(cid, (bot, ev))
+    persist(ev, cid)
+
+
+store = GameStore(Path(__file__).parent / config.STORE_PATH, config.STORE_FLUSH_INTERVAL) if config.STORE_ENABLED else None
+
+
+def persist(ev, cid: str):
+    # 记录发送消息所需的最少字段，恢复时据此重建 CQEvent
+    game = games.get(cid, None)
+    if store and game:
+        store.save(cid, game.word, game.meaning, game.dic, game.guessed_words, time.time() + sweeper.timeout, event_target(ev))
+
+
+async def relay_send(target, message: str, kwargs):
+    # 分片模式下工作进程交回的消息
+    await hoshino.get_bot().send(CQEvent(target), message, **kwargs)
+
+
+def plugin_samples():
+    # 导出指标时的即时取值
+    stats = image_cache.stats()
+    yield "wordle_active_games", {}, len(games)
+    yield "wordle_image_cache_hits_total", {}, stats["hits"]
+    yield "wordle_image_cache_misses_total", {}, stats["misses"]
+    yield "wordle_image_cache_bytes", {}, stats["bytes"]
+    for source, count in checker.stats.items():
+        yield "wordle_legality_checks_total", {"source": source}, count
+
+
+metrics.add_collector(plugin_samples)
+
+
+async def metrics_endpoint():
+    return metrics.prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+engine_link = None  # 工作进程中由 engine.serve 设置，用于把会话的单词长度同步给主进程
+engines = EnginePool(__name__, config.ENGINE_WORKERS, relay_send, set_length) if config.ENGINE_WORKERS > 0 else None
+
+
+async def restore_games(bot, owns: Callable[[str], bool] = lambda cid: True):
+    if not store:
+        return
+    now = time.time()
+    rows = await asyncio.get_running_loop().run_in_executor(None, store.load)
+    for cid, word, meaning, dic, guesses, deadline, target in rows:
+        if not owns(cid):
+            continue
+        game = Wordle(word, meaning, dic)
+        if game.word_lower in guesses or len(guesses) >= game.rows:
+            # 删除按间隔批量写入，崩溃时可能丢失：已猜中或已猜满的游戏恢复后再也无法结束
+            store.delete(cid)
+            continue
+        ev = CQEvent(target)
+        for guess in guesses:
+            game.accept(guess)
+        add_game(ev, cid, game)
+        sweeper.restore(cid, (bot, ev), deadline - now)
+
+
+def schedule_warm_up():
+    if config.WARMUP_DELAY is not None:
+        asyncio.ensure_future(warm_up_later(config.WARMUP_DELAY))
+
+
+@nonebot.on_startup
+async def startup():
+    if image_files is not None:
+        image_files.start()
+    if metrics.enabled:
+        if config.METRICS_FILE:
+            metrics.start_export(Path(__file__).parent / config.METRICS_FILE, config.METRICS_FILE_INTERVAL)
+        if config.METRICS_ROUTE:
+            hoshino.get_bot().server_app.route(config.METRICS_ROUTE)(metrics_endpoint)
+    if engines is not None:
+        # 分片模式下游戏的恢复与预加载都在各工作进程中进行
+        await engines.start()
+        return
+    await restore_games(hoshino.get_bot())
+    schedule_warm_up()
+
+
+@nonebot.on_shutdown
+async def shutdown():
+    if engines is not None:
+        await engines.close()
+    if store:
+        store.close()
 
 
 async def handle_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False):
+    if engines is not None:
+        # 分片模式：交给该会话所在的工作进程处理，消息由工作进程交回后发出
+        try:
+            await engines.call(get_cid(ev), event_target(ev), argv, no_response)
+        except EngineUnavailable:
+            if not no_response:
+                await bot.send(ev, "游戏服务正在重启，请稍后再试")
+        return
+    # 同一会话的指令按到达顺序逐条处理
+    async with chat_locks.hold(get_cid(ev)):
+        await run_wordle(bot, ev, argv, no_response)
+
+
+async def run_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False):
     # print("读取", argv)
 
-    async def send(message: Optional[str] = None, image: Optional[BytesIO] = None) -> NoReturn:
+    async def send(message: Optional[str] = None, image: Optional[Callable[[], BytesIO]] = None) -> NoReturn:
         if no_response:
             await bot.finish(ev, "")
         msg = []
         if image:
-            byte_data = image.getvalue()
-            base64_str = base64.b64encode(byte_data).decode()
-            image = 'base64://' + base64_str
+            # 绘图与 base64 编码在绘图池中进行
+            try:
+                image = await render_pool.render(image)
+            except RenderBusy:
+                await bot.finish(ev, "当前绘图任务过多，请稍后再试")
             msg.append(f'{MessageSegment.image(image)}')
         if message:
             msg.append(f'{message}')
-        msg = "\n".join(msg)
-        await bot.finish(ev, msg.strip())  # 如果消息为空不会执行发送，仅利用bot.finish的机制将当前会话结束。
+        msg = "\n".join(msg).strip()
+        if msg:
+            with metrics.timer("send"):
+                await bot.finish(ev, msg)
+        await bot.finish(ev, msg)  # 如果消息为空不会执行发送，仅利用bot.finish的机制将当前会话结束。
 
-    args = {'length': 0, 'dic': "", 'hint': False, 'stop': False, 'word': ""}
+    args = {'length': 0, 'dic': "", 'difficulty': "", 'hint': False, 'best': False, 'stop': False, 'word': ""}
     N = len(argv)
     if N == 1:
         if (argv[0] == '--hint'):
             args['hint'] = True
+        elif argv[0] == '--best':
+            args['best'] = True
         elif argv[0] == '--stop':
             args['stop'] = True
         else:
@@ -207,12 +430,14 @@ async def handle_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False)
                 args["length"] = int(argv[i + 1])
             if (argv[i] == '--dic'):
                 args["dic"] = argv[i + 1]
+            if (argv[i] == '--difficulty'):
+                args["difficulty"] = argv[i + 1]
     # print("解析", args)
     options = Options(**args)
 
     cid = get_cid(ev)
     if not games.get(cid, None):
-        if options.word or options.stop or options.hint:
+        if options.word or options.stop or options.hint or options.best:
             await send("没有正在进行的游戏")
 
         if not (options.length and options.dic):
@@ -224,15 +449,21 @@ async def handle_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False)
         if options.dic not in dic_list:
             await send("支持的词典：" + ", ".join(dic_list))
 
-        word, meaning = random_word(options.dic, options.length)
-        print(f'\n\n\n正确答案为：{word}\n正确答案为：{word}\n正确答案为：{word}\n\n\n')
-        game = Wordle(word, meaning)
-        games[cid] = game
-        set_timeout(bot, ev, cid)
-
-        await send(f"你有{game.rows}次机会猜出单词，单词长度为{game.length}，请发送单词", game.draw())
+        # 从选词到发出首张棋盘
+        with metrics.timer("start"):
+            picked = random_word(options.dic, options.length, options.difficulty)
+            if picked is None:
+                await send(f"{options.dic}中没有{options.length}个字母、难度为{options.difficulty}的单词")
+            word, meaning = picked
+            print(f'\n\n\n正确答案为：{word}\n正确答案为：{word}\n正确答案为：{word}\n\n\n')
+            game = Wordle(word, meaning, options.dic)
+            add_game(ev, cid, game)
+            set_timeout(bot, ev, cid)
+            metrics.inc("wordle_games_started_total", dic=options.dic)
+
+            await send(f"你有{game.rows}次机会猜出单词，单词长度为{game.length}，请发送单词", game.draw)
     if options.stop:
-        game = games.pop(cid)
+        game = pop_game(ev, cid)
         msg = "游戏已结束"
         if len(game.guessed_words) >= 1:
             msg += f"\n{game.result}"
@@ -245,7 +476,20 @@ async def handle_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False)
         hint = game.get_hint()
         if not hint.replace("*", ""):
             await send("你还没有猜对过一个字母哦~再猜猜吧~")
-        await send(image=game.draw_hint(hint))
+        await send(image=partial(game.draw_hint, hint))
+
+    if options.best:
+        if not solver.available():
+            await send("未安装 numpy，暂不支持推荐猜测")
+        # 首次使用某词典的某长度时需要计算反馈矩阵，放到线程中进行
+        loop = asyncio.get_running_loop()
+        with metrics.timer("best"):
+            best, remaining = await loop.run_in_executor(
+                None, solver.suggest_next, game.dic, game.length, game.guessed_words, list(game.state.patterns)
+            )
+        if best is None:
+            await send("词典中已经没有符合条件的单词了")
+        await send(f"还有{remaining}个可能的单词，推荐猜：{best}")
 
     word = options.word
 
@@ -257,25 +501,26 @@ async def handle_wordle(bot: HoshinoBot, ev, argv: List[str], no_response=False)
 
     no_response = False
     result = game.guess(word)
+    metrics.inc("wordle_guesses_total", result=result.name.lower() if result else "accepted")
     if result in [GuessResult.WIN, GuessResult.LOSS]:
-        games.pop(cid)
+        pop_game(ev, cid)
         await send(
             ("恭喜你猜出了单词！" if result == GuessResult.WIN else "很遗憾，没有人猜出来呢")
             + f"\n{game.result}",
-            game.draw(),
+            game.draw,
         )
     elif result == GuessResult.DUPLICATE:
         await send("你已经猜过这个单词了呢")
     elif result == GuessResult.ILLEGAL:
-        le = str(len(word))
-        if le in words_by_len:
-            guess_word, score = process.extractOne(word.lower(), words_by_len[le].keys(), processor=my_lower)
-            await send(f'{word}不被接受\n您有{score}%可能说的是{guess_word}\n({words_by_len[le][guess_word].strip()})')
+        suggest_index = get_suggest_index()
+        suggestion = suggest_index.suggest(word)
+        if suggestion:
+            guess_word, score = suggestion
+            await send(f'{word}不被接受\n您有{score}%可能说的是{guess_word}\n({suggest_index.meaning(guess_word)})')
         await send(f"你确定{word}是一个合法的单词吗？")
     else:
+        persist(ev, cid)
+        # 棋盘稍后合并发送，连续多人猜测时只发一张图
+        board_updates.schedule(cid, (bot, ev))
+        await send()
 
-        await send(image=game.draw())
-
-
-def my_lower(string) -> str:
-    return string.lower()
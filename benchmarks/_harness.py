@@ -0,0 +1,181 @@
+"""
+基准测试用的 HoshinoBot 运行环境替身：不依赖 hoshino / nonebot 即可加载本插件。
+
+仅替换机器人框架本身；PIL、fuzzywuzzy 等插件依赖仍需安装。
+"""
+import importlib.util
+import sys
+import types
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+root = Path(__file__).resolve().parent.parent
+
+
+class FinishedException(Exception):
+    """bot.finish 结束当前会话"""
+
+
+class Message(str):
+    def extract_plain_text(self) -> str:
+        return str(self)
+
+
+class CQEvent(dict):
+    # 与 aiocqhttp.Event 相同：字段既可按键也可按属性访问
+    def __getattr__(self, key):
+        return self.get(key)
+
+
+def make_event(message: str, group_id: int = None, user_id: int = 10000, self_id: int = 1) -> CQEvent:
+    return CQEvent(
+        post_type="message",
+        message_type="group" if group_id else "private",
+        message=Message(message),
+        group_id=group_id,
+        user_id=user_id,
+        self_id=self_id,
+    )
+
+
+class HoshinoBot(object):
+    def __init__(self):
+        self.sent: List[Tuple[CQEvent, str]] = []
+
+    async def send(self, ev, message, **kwargs):
+        self.sent.append((ev, str(message)))
+
+    async def finish(self, ev, message, **kwargs):
+        if message:
+            await self.send(ev, message, **kwargs)
+        raise FinishedException()
+
+
+class Service(object):
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self.prefix: List[Tuple[Tuple[str, ...], Callable]] = []
+        self.fullmatch: List[Tuple[Tuple[str, ...], Callable]] = []
+        self.message: List[Callable] = []
+
+    def on_prefix(self, *prefix):
+        def deco(func):
+            self.prefix.append((prefix, func))
+            return func
+        return deco
+
+    def on_fullmatch(self, *words):
+        def deco(func):
+            self.fullmatch.append((words, func))
+            return func
+        return deco
+
+    def on_message(self, *args):
+        def deco(func):
+            self.message.append(func)
+            return func
+        return deco
+
+    async def dispatch(self, bot: HoshinoBot, ev: CQEvent):
+        # 与 hoshino 相同的匹配顺序：完全匹配、前缀、最后是所有消息
+        text = str(ev.message).strip()
+        try:
+            for words, func in self.fullmatch:
+                if text in words:
+                    return await func(bot, ev)
+            # 与 hoshino 的前缀树相同，取最长的匹配前缀
+            matched = [(p, func) for prefix, func in self.prefix for p in prefix if text.startswith(p)]
+            if matched:
+                p, func = max(matched, key=lambda m: len(m[0]))
+                ev["message"] = Message(text[len(p):].strip())
+                return await func(bot, ev)
+            for func in self.message:
+                await func(bot, ev)
+        except FinishedException:
+            pass
+
+
+class MessageSegment(object):
+    @staticmethod
+    def image(file: str) -> str:
+        return f"[CQ:image,file={file[:32]}]"
+
+
+superusers: List[int] = []  # 测试中视为超级用户的 QQ 号
+
+
+def check_priv(ev, require: int) -> bool:
+    return ev.user_id in superusers
+
+
+bot = HoshinoBot()
+startup_hooks: List[Callable] = []
+shutdown_hooks: List[Callable] = []
+
+
+def get_bot() -> HoshinoBot:
+    return bot
+
+
+def on_startup(func):
+    startup_hooks.append(func)
+    return func
+
+
+def on_shutdown(func):
+    shutdown_hooks.append(func)
+    return func
+
+
+async def startup():
+    for func in startup_hooks:
+        await func()
+
+
+async def shutdown():
+    for func in shutdown_hooks:
+        await func()
+
+
+def install_stubs():
+    hoshino = types.ModuleType("hoshino")
+    hoshino.Service = Service
+    hoshino.HoshinoBot = HoshinoBot
+    hoshino_typing = types.ModuleType("hoshino.typing")
+    hoshino_typing.CQEvent = CQEvent
+    hoshino_typing.HoshinoBot = HoshinoBot
+    hoshino.typing = hoshino_typing
+    hoshino.get_bot = get_bot
+    priv = types.ModuleType("hoshino.priv")
+    priv.SUPERUSER = 999
+    priv.check_priv = check_priv
+    hoshino.priv = priv
+    nonebot = types.ModuleType("nonebot")
+    nonebot.MessageSegment = MessageSegment
+    nonebot.on_startup = on_startup
+    nonebot.on_shutdown = on_shutdown
+    nonebot.get_bot = get_bot
+    sys.modules.setdefault("hoshino", hoshino)
+    sys.modules.setdefault("hoshino.typing", hoshino_typing)
+    sys.modules.setdefault("hoshino.priv", priv)
+    sys.modules.setdefault("nonebot", nonebot)
+
+
+def load_plugin(name: str = "wordle"):
+    install_stubs()
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, root / "__init__.py", submodule_search_locations=[str(root)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_sync(coro):
+    # 不经过事件循环直接驱动不会挂起的协程，用于测量处理函数本身的开销
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("协程发生了挂起")
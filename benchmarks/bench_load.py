@@ -0,0 +1,259 @@
+"""
+端到端压力测试：在一个事件循环中模拟大量群同时游戏，消息经由 hoshino 替身的分发逻辑
+（完全匹配、前缀、on_message）进入插件，覆盖参数解析、绘图池、棋盘合并、超时回收等完整流程。
+
+    python benchmarks/bench_load.py                                   # 生成并回放默认负载
+    python benchmarks/bench_load.py --chats 500 --duration 60 --save trace.jsonl
+    python benchmarks/bench_load.py --replay trace.jsonl --speed 2    # 按 2 倍速回放保存的消息序列
+
+消息序列为 JSONL，每行一条：{"t": 秒, "group": 群号, "user": QQ号, "text": 消息, "kind": 类别}，
+私聊时 group 为 null，kind 可省略。生成的序列包含：
+    start    开始游戏            guess    合法猜测（直接发送或“我猜”）
+    typo     拼错的单词（触发联想）  hint     猜单词提示
+    stop     猜单词结束          chatter  闲聊（有游戏的群与只闲聊的群）
+部分游戏在几步之后无人理会，由超时回收结束。
+
+消息按序列中的时间点投递，回复延迟从该时间点算起（包括事件循环排队），每条消息只计第一条回复。
+合法猜测的回复是合并后的棋盘，含 BOARD_COALESCE_DELAY 的等待（默认为 0），且绘制期间到达的连续猜测只有最后一条得到回复。
+事件循环延迟由一个每 10ms 醒来一次的任务测量实际醒来时间比预定晚了多少。
+吞吐在负载未饱和时等于序列本身的速率；逐步提高 --speed 直到延迟明显上升，可得到能承受的吞吐。
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from _harness import load_plugin, make_event, CQEvent, HoshinoBot
+
+plugin = load_plugin()
+
+from wordle.data_source import Wordle  # noqa: E402
+from wordle.image_cache import image_cache  # noqa: E402
+from wordle.legality import checker  # noqa: E402
+from wordle.utils import get_word_list  # noqa: E402
+from wordle.warmup import warm_up  # noqa: E402
+
+Trace = List[Dict[str, object]]
+
+chatter = ["hello", "今天打本吗", "ok", "nice", "哈哈哈哈", "apple", "[CQ:face,id=14]", "wordle is fun", "？", "早"]
+lengths = [5] * 6 + [4, 6, 7, 8]  # 开始游戏时的单词长度分布
+
+
+def generate(args, rng: random.Random) -> Trace:
+    words = {n: [w.lower() for w in get_word_list().words(n) if w.isalpha()] for n in set(lengths)}
+    trace: Trace = []
+
+    def add(t: float, group: int, text: str, kind: str):
+        if t < args.duration:
+            trace.append({"t": round(t, 4), "group": group, "user": 20000 + rng.randrange(50), "text": text, "kind": kind})
+
+    def gap() -> float:
+        # 游戏中的停顿不超过超时时间，只有被放弃的游戏才会超时
+        return min(rng.expovariate(1 / args.think), 0.8 * args.game_timeout)
+
+    for i in range(args.chats):
+        group = 100000 + i
+        t = rng.uniform(0, args.think)
+        while t < args.duration:
+            length = rng.choice(lengths)
+            add(t, group, "猜单词" if length == 5 and rng.random() < 0.5 else f"猜单词 {length} CET4", "start")
+            # 留一行不猜，避免游戏因猜满而提前结束
+            for _ in range(rng.randint(1, Wordle("a" * length, "", "CET4").rows - 1)):
+                t += gap()
+                r = rng.random()
+                if r < 0.6:
+                    word = rng.choice(words[length])
+                    add(t, group, word if rng.random() < 0.7 else f"我猜{word}", "guess")
+                elif r < 0.75:
+                    word = rng.choice(words[length])
+                    j = rng.randrange(length)
+                    add(t, group, word[:j] + ("z" if word[j] != "z" else "q") + word[j + 1:], "typo")
+                elif r < 0.8:
+                    add(t, group, "猜单词提示", "hint")
+                else:
+                    add(t, group, rng.choice(chatter), "chatter")
+            t += gap()
+            if rng.random() < args.abandon:
+                t += args.game_timeout + args.sweep_interval + gap()  # 等待超时结束
+            else:
+                add(t, group, "猜单词结束", "stop")
+                t += gap()
+    for i in range(args.idle_chats):
+        group = 200000 + i
+        t = rng.expovariate(1 / args.chatter_gap)
+        while t < args.duration:
+            add(t, group, rng.choice(chatter), "chatter")
+            t += rng.expovariate(1 / args.chatter_gap)
+    trace.sort(key=lambda e: e["t"])
+    return trace
+
+
+class LoadBot(HoshinoBot):
+    """记录每条消息第一条回复的延迟，不保存消息内容"""
+
+    def __init__(self):
+        super().__init__()
+        self.pending: Dict[int, Tuple[CQEvent, float, str]] = {}  # id(事件) -> (事件, 投递时间, 类别)，持有事件以免 id 被复用
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.replies = 0
+        self.timeouts = 0
+        self.busy = 0
+
+    async def send(self, ev, message, **kwargs):
+        now = time.perf_counter()
+        message = str(message)
+        self.replies += 1
+        if message.startswith("猜单词超时"):
+            # 回复的是超时，而不是该事件本身
+            self.timeouts += 1
+            return
+        if message.startswith("当前绘图任务过多"):
+            self.busy += 1
+        sent = self.pending.pop(id(ev), None)
+        if sent is not None:
+            self.latency[sent[2]].append(now - sent[1])
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def monitor_lag(lags: List[float], interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def replay(trace: Trace, bot: LoadBot, speed: float, drain: float) -> Dict[str, object]:
+    loop = asyncio.get_running_loop()
+    lags: List[float] = []
+    lag_task = loop.create_task(monitor_lag(lags))
+    tasks = set()
+    handled = Counter()
+    start = time.perf_counter()
+
+    async def deliver(ev, kind: str):
+        await plugin.sv.dispatch(bot, ev)
+        handled[kind] += 1
+
+    for entry in trace:
+        due = start + entry["t"] / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        ev = make_event(entry["text"], group_id=entry.get("group"), user_id=entry["user"])
+        kind = entry.get("kind") or "other"
+        bot.pending[id(ev)] = (ev, due, kind)
+        task = loop.create_task(deliver(ev, kind))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(set(tasks))
+    handled_at = time.perf_counter()
+    # 等待合并的棋盘发出；超时结束的游戏最多再等 drain 秒
+    deadline = handled_at + drain
+    while (plugin.board_updates.tasks or plugin.sweeper.deadlines) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    lag_task.cancel()
+    return {"elapsed": handled_at - start, "handled": handled, "lags": lags}
+
+
+def report(trace: Trace, bot: LoadBot, result: Dict[str, object], args):
+    elapsed = result["elapsed"]
+    handled: Counter = result["handled"]
+    total = sum(handled.values())
+    print(f"消息 {total} 条，用时 {elapsed:.2f}s，吞吐 {total / elapsed:.1f} 条/s（序列时长 {trace[-1]['t'] / args.speed:.1f}s）")
+    print(f"回复 {bot.replies} 条，超时结束 {bot.timeouts} 局，绘图繁忙 {bot.busy} 次，结束时仍在进行 {len(plugin.games)} 局")
+    print()
+    print(f"{'类别':10s} {'消息':>7s} {'有回复':>7s} {'p50(ms)':>9s} {'p99(ms)':>9s} {'max(ms)':>9s}")
+    latencies = []
+    for kind in sorted(handled):
+        values = bot.latency.get(kind, [])
+        latencies += [] if kind == "guess" else values
+        print(
+            f"{kind:10s} {handled[kind]:7d} {len(values):7d} "
+            f"{percentile(values, 0.5) * 1e3:9.2f} {percentile(values, 0.99) * 1e3:9.2f} "
+            f"{(max(values) if values else float('nan')) * 1e3:9.2f}"
+        )
+    print(
+        f"{'除猜测外':10s} {'':7s} {len(latencies):7d} "
+        f"{percentile(latencies, 0.5) * 1e3:9.2f} {percentile(latencies, 0.99) * 1e3:9.2f}"
+    )
+    lags = result["lags"]
+    print()
+    print(
+        f"事件循环延迟：p50 {percentile(lags, 0.5) * 1e3:.2f}ms  p99 {percentile(lags, 0.99) * 1e3:.2f}ms  "
+        f"max {(max(lags) if lags else float('nan')) * 1e3:.2f}ms"
+    )
+    stats = image_cache.stats()
+    print(f"图片缓存：{stats['entries']} 张 {stats['bytes'] / 1024:.0f}KB，命中率 {stats['hit_ratio']:.1%}")
+    # Linux 下 ru_maxrss 的单位为 KB
+    print(f"进程峰值内存：{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB")
+
+
+async def main_async(args, trace: Trace):
+    bot = LoadBot()
+    plugin.store = None  # 不写入游戏存档
+    # 超时随回放倍速缩短，与序列中的等待时间一致
+    plugin.sweeper.timeout = args.game_timeout / args.speed
+    plugin.sweeper.interval = args.sweep_interval / args.speed
+    # 插件开局时会打印答案，压测时丢弃
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = await replay(trace, bot, args.speed, args.drain)
+    plugin.render_pool.shutdown()
+    report(trace, bot, result, args)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="猜单词插件端到端压力测试")
+    parser.add_argument("--chats", type=int, default=200, help="进行游戏的群数")
+    parser.add_argument("--idle-chats", type=int, default=800, help="只闲聊的群数")
+    parser.add_argument("--duration", type=float, default=30, help="生成的序列时长（秒）")
+    parser.add_argument("--think", type=float, default=3, help="游戏中相邻两条消息的平均间隔（秒）")
+    parser.add_argument("--chatter-gap", type=float, default=10, help="闲聊群相邻两条消息的平均间隔（秒）")
+    parser.add_argument("--abandon", type=float, default=0.2, help="无人理会直至超时的游戏比例")
+    parser.add_argument("--game-timeout", type=float, default=5, help="游戏超时（秒），代替 GAME_TIMEOUT")
+    parser.add_argument("--sweep-interval", type=float, default=1, help="超时检查间隔（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="把生成的序列写入 JSONL 文件")
+    parser.add_argument("--replay", help="回放 JSONL 文件中的序列，不再生成")
+    parser.add_argument("--speed", type=float, default=1, help="回放倍速")
+    parser.add_argument("--cold", action="store_true", help="不预加载，包含首次加载词库等的开销")
+    parser.add_argument("--drain", type=float, default=None, help="消息投递完后等待超时回收的最长时间，默认为游戏超时加两次检查间隔")
+    args = parser.parse_args()
+    if args.drain is None:
+        args.drain = (args.game_timeout + 2 * args.sweep_interval) / args.speed
+
+    checker.offline = True  # 结果不依赖 enchant 及其词典版本
+    if not args.cold:
+        warm_up()  # 与运行中的机器人相同，词库、字体等已预先加载
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            trace = [json.loads(line) for line in f if line.strip()]
+    else:
+        trace = generate(args, random.Random(args.seed))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            for entry in trace:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    if not trace:
+        print("消息序列为空")
+        return 1
+    asyncio.run(main_async(args, trace))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
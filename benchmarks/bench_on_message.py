@@ -0,0 +1,52 @@
+"""
+测量 on_message 对无游戏会话的普通聊天消息的单条开销，并与旧实现对比。
+
+python benchmarks/bench_on_message.py
+"""
+import re
+import sys
+import time
+
+from _harness import load_plugin, make_event, run_sync, HoshinoBot, FinishedException
+
+plugin = load_plugin()
+min_len, max_len = plugin.min_len, plugin.max_len
+on_message = plugin.sv.message[0]
+
+
+async def legacy_on_message(bot, ev):
+    # 改动前的实现：先处理文本，再进入 handle_wordle 解析参数后才发现没有游戏
+    text = str(ev.message).strip()
+    if min_len <= len(text) <= max_len:
+        if re.fullmatch(r"^[a-zA-Z]+$", text) is not None:
+            try:
+                await plugin.handle_wordle(bot, ev, [text], no_response=True)
+            except FinishedException:
+                pass
+
+
+async def empty_handler(bot, ev):
+    # 协程创建与驱动本身的开销
+    pass
+
+
+def bench(handler, events, rounds: int = 20) -> float:
+    bot = HoshinoBot()
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for ev in events:
+            run_sync(handler(bot, ev))
+        best = min(best, (time.perf_counter() - start) / len(events))
+    return best * 1e9
+
+
+def main():
+    chatter = ["hello", "今天打本吗", "ok", "nice", "哈哈哈哈", "apple", "[CQ:face,id=14]", "wordle is fun"]
+    events = [make_event(chatter[i % len(chatter)], group_id=100000 + i % 500) for i in range(20000)]
+    for name, handler in (("empty", empty_handler), ("legacy", legacy_on_message), ("current", on_message)):
+        print(f"{name:8s} {bench(handler, events):8.1f} ns/msg")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+游戏引擎与绘图的基准测试，可离线运行，结果写为 JSON 以便比较两次运行。
+
+    python benchmarks/bench_suite.py run -o before.json          # 全部测试
+    python benchmarks/bench_suite.py run --quick -k render       # 少量重复，只跑名称含 render 的项
+    python benchmarks/bench_suite.py compare before.json after.json --threshold 0.1
+
+测试项：
+    start/<词典>/<长度>        出题（random_word）并创建 Wordle
+    guess/get_color/<长度>     计算一次猜测的颜色
+    guess/accept/<长度>        新建一局并接受猜测直到只剩最后一行
+    legal/known, legal/unknown 单词合法性检查（离线模式，结果不依赖 enchant）
+    render/<长度>x<已猜行数>   从零绘制整张棋盘并编码 PNG（不经图片缓存）
+    hint/<长度>                绘制并编码提示图片（不经图片缓存）
+    suggest/typo/<长度>        非法单词的联想（相差一个字母）
+    suggest/fallback/<长度>    没有近似候选的输入（不给出联想）
+    memory/game, memory/game_with_board   每局游戏常驻内存（已猜 3 次；后者含常驻棋盘的像素）
+
+时间单位为微秒（每次操作的最好成绩），内存单位为字节；数值均为越小越好。
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from _harness import load_plugin, root
+
+plugin = load_plugin()
+
+import PIL  # noqa: E402
+
+from wordle.data_source import Wordle, min_len, max_len  # noqa: E402
+from wordle.image_cache import image_cache  # noqa: E402
+from wordle.legality import checker  # noqa: E402
+from wordle.suggest import get_suggest_index  # noqa: E402
+from wordle.utils import dic_list, random_word, legal_word, get_word_list  # noqa: E402
+
+Results = Dict[str, Dict[str, object]]
+
+
+class Suite(object):
+    def __init__(self, quick: bool, pattern: Optional[str]):
+        self.repeat = 3 if quick else 7
+        self.scale = 0.2 if quick else 1.0
+        self.pattern = pattern
+        self.results: Results = {}
+
+    def wanted(self, name: str) -> bool:
+        return self.pattern is None or self.pattern in name
+
+    def time(self, name: str, func: Callable[[], object], number: int, per: int = 1):
+        # func 一次处理 per 个输入时，结果按单个输入计
+        if not self.wanted(name):
+            return
+        number = max(1, int(number * self.scale))
+        func()  # 预热：加载词库、字体、文字块等
+        best = min(timeit.Timer(func).repeat(self.repeat, number)) / number / per
+        self.record(name, best * 1e6, "us")
+
+    def record(self, name: str, value: float, unit: str):
+        self.results[name] = {"value": round(value, 3), "unit": unit}
+        print(f"{name:32s} {value:12.2f} {unit}", flush=True)
+
+
+def sample_words(length: int, n: int, rng: random.Random) -> List[str]:
+    words = [w.lower() for w in get_word_list().words(length) if w.isalpha()]
+    return rng.sample(words, min(n, len(words)))
+
+
+def bench_start(suite: Suite):
+    for dic_name in sorted(dic_list):
+        for length in range(min_len, max_len + 1):
+            try:
+                random_word(dic_name, length)
+            except (KeyError, IndexError):
+                continue  # 该词典没有此长度的单词
+
+            def start():
+                word, meaning = random_word(dic_name, length)
+                Wordle(word, meaning, dic_name)
+
+            suite.time(f"start/{dic_name}/{length}", start, 2000)
+
+
+def bench_guess(suite: Suite, rng: random.Random):
+    for length in range(min_len, max_len + 1):
+        words = sample_words(length, 64, rng)
+        game = Wordle(words[0], "", "CET4")
+        pairs = [(rng.choice(words), rng.choice(words)) for _ in range(64)]
+        suite.time(f"guess/get_color/{length}", lambda: [game.get_color(a, b) for a, b in pairs], 100, len(pairs))
+
+        def accept():
+            g = Wordle(words[0], "", "CET4")
+            for w in words[1:g.rows]:
+                g.accept(w)
+            return g
+
+        suite.time(f"guess/accept/{length}", accept, 200)
+
+    known = sample_words(5, 256, rng)
+    unknown = ["".join(rng.choice("qxzjv") for _ in range(5)) for _ in range(256)]
+    suite.time("legal/known", lambda: [legal_word(w) for w in known], 50, len(known))
+    suite.time("legal/unknown", lambda: [legal_word(w) for w in unknown], 50, len(unknown))
+
+
+def bench_render(suite: Suite, rng: random.Random):
+    cache_size = image_cache.max_bytes
+    image_cache.max_bytes = 0
+    try:
+        for length in range(min_len, max_len + 1):
+            words = sample_words(length, 16, rng)
+            rows = Wordle(words[0], "", "CET4").rows
+            for guessed in range(rows + 1):
+                game = Wordle(words[0], "", "CET4")
+                for w in (words[1:] * 2)[:guessed]:
+                    game.accept(w)
+
+                def render():
+                    game.board = None  # 从零绘制，不复用常驻棋盘
+                    return game.draw()
+
+                suite.time(f"render/{length}x{guessed}", render, 20)
+            game = Wordle(words[0], "", "CET4")
+            hint = "".join(c if i % 2 else "*" for i, c in enumerate(words[0]))
+            suite.time(f"hint/{length}", lambda: game.draw_hint(hint), 50)
+    finally:
+        image_cache.max_bytes = cache_size
+
+
+def bench_suggest(suite: Suite, rng: random.Random):
+    index = get_suggest_index()
+    for length in range(min_len, max_len + 1):
+        words = sample_words(length, 32, rng)
+        typos = []
+        for w in words:
+            i = rng.randrange(length)
+            typos.append(w[:i] + ("z" if w[i] != "z" else "q") + w[i + 1:])
+        suite.time(f"suggest/typo/{length}", lambda: [index.suggest(w) for w in typos], 5, len(typos))
+        nonsense = "".join(rng.choice("zqxj") for _ in range(length))
+        suite.time(f"suggest/fallback/{length}", lambda: index.suggest(nonsense), 2)
+
+
+def bench_memory(suite: Suite, rng: random.Random):
+    if not (suite.wanted("memory/game") or suite.wanted("memory/game_with_board")):
+        return
+    words = sample_words(5, 64, rng)
+    n = 500
+    for name, draw in (("memory/game", False), ("memory/game_with_board", True)):
+        games = [Wordle(words[0], "", "CET4")]  # 共享的主题、文字块等先行创建
+        games[0].draw()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for i in range(n):
+            game = Wordle(words[i % len(words)], "释义", "CET4")
+            for w in words[1:4]:
+                game.accept(w)
+            if draw:
+                game.draw_board()
+            games.append(game)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        # 图片像素由 PIL 在 C 层分配，tracemalloc 看不到，按尺寸另行计入
+        size += sum(g.board.width * g.board.height * len(g.board.getbands()) for g in games[1:] if g.board is not None)
+        suite.record(name, size / n, "B")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> int:
+    checker.offline = True  # 结果不依赖 enchant 及其词典版本
+    suite = Suite(args.quick, args.k)
+    rng = random.Random(args.seed)
+    bench_start(suite)
+    bench_guess(suite, rng)
+    bench_render(suite, rng)
+    bench_suggest(suite, rng)
+    bench_memory(suite, rng)
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pillow": PIL.__version__,
+            "quick": args.quick,
+            "seed": args.seed,
+        },
+        "results": suite.results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)["results"]
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)["results"]
+    regressions = 0
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name]["value"], after[name]["value"]
+        ratio = new / old if old else float("inf")
+        mark = ""
+        if ratio > 1 + args.threshold:
+            mark = "  <-- 变慢" if before[name]["unit"] == "us" else "  <-- 变大"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            mark = "  改进"
+        print(f"{name:32s} {old:12.2f} -> {new:12.2f} {before[name]['unit']:2s} {ratio:6.2f}x{mark}")
+    only = len(set(before) ^ set(after))
+    if only:
+        print(f"\n另有 {only} 项只出现在其中一次结果中")
+    print(f"\n{regressions} 项超过阈值 {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="猜单词插件基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="运行测试")
+    p.add_argument("-o", "--output", help="结果 JSON 文件")
+    p.add_argument("-k", help="只运行名称包含该字符串的测试")
+    p.add_argument("--quick", action="store_true", help="减少重复次数，用于快速检查")
+    p.add_argument("--seed", type=int, default=0)
+    p = sub.add_parser("compare", help="比较两次结果，有退化时返回 1")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.add_argument("--threshold", type=float, default=0.1, help="视为退化的相对变化，默认 0.1")
+    args = parser.parse_args()
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+候选词位图索引：按词典与单词长度，为每个 (位置, 字母) 与 (字母, 至少出现次数) 预先计算一个位图，
+位图以 Python 大整数表示，第 i 位对应词表中第 i 个单词。
+
+一次猜测的反馈对应若干次按位与：
+    绿色    该位置必须是此字母
+    黄/灰   该位置不能是此字母
+    计数    非灰色的次数为下限；出现灰色时同时为上限
+"""
+import random
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .word_index import get_word_index, dic_list, ALL_WORDS
+
+CORRECT = 2  # 与 Constraints.CORRECT 一致
+WRONG = 0
+
+rare_letters = "jqxz"
+difficulties = ("简单", "困难")  # 简单：无重复字母、不含生僻字母；困难：其余单词
+
+
+def _to_int(bits: bytearray) -> int:
+    return int.from_bytes(bits, "little")
+
+
+class CandidateIndex(object):
+    def __init__(self, dic_name: str, length: int):
+        index = get_word_index(dic_name)
+        seen = set()
+        self.words: List[str] = []  # 原始拼写，用于查询释义
+        for word in index.words(length):
+            lower = word.lower()
+            if lower.isascii() and lower.isalpha() and lower not in seen:
+                seen.add(lower)
+                self.words.append(word)
+        self.index = index
+        self.length = length
+        self.all = (1 << len(self.words)) - 1
+
+        size = (len(self.words) + 7) // 8
+        at = [[bytearray(size) for _ in range(26)] for _ in range(length)]
+        at_least = [[bytearray(size) for _ in range(length + 1)] for _ in range(26)]
+        for i, word in enumerate(self.words):
+            byte, bit = i >> 3, 1 << (i & 7)
+            counts = [0] * 26
+            for j, cha in enumerate(word.lower()):
+                c = ord(cha) - 97
+                at[j][c][byte] |= bit
+                counts[c] += 1
+                at_least[c][counts[c]][byte] |= bit
+        self.at: List[List[int]] = [[_to_int(b) for b in row] for row in at]  # at[位置][字母]
+        # at_least[字母][k]：该字母至少出现 k 次的单词
+        self.at_least: List[List[int]] = [[_to_int(b) for b in row] for row in at_least]
+
+    def filter(self, guesses: Iterable[str], patterns: Iterable[bytes], mask: Optional[int] = None) -> int:
+        """返回与全部反馈一致的单词位图"""
+        if mask is None:
+            mask = self.all
+        for word, pattern in zip(guesses, patterns):
+            counts: Dict[int, int] = {}
+            greyed = set()
+            for j, cha in enumerate(word):
+                c = ord(cha) - 97
+                if pattern[j] == CORRECT:
+                    mask &= self.at[j][c]
+                else:
+                    mask &= ~self.at[j][c]
+                if pattern[j] == WRONG:
+                    greyed.add(c)
+                else:
+                    counts[c] = counts.get(c, 0) + 1
+            for c, cnt in counts.items():
+                mask &= self.at_least[c][cnt]
+            for c in greyed:
+                cnt = counts.get(c, 0)
+                if cnt < self.length:
+                    mask &= ~self.at_least[c][cnt + 1]
+        return mask
+
+    def count(self, guesses: Iterable[str], patterns: Iterable[bytes]) -> int:
+        return bin(self.filter(guesses, patterns)).count("1")
+
+    def difficulty_mask(self, difficulty: str) -> int:
+        easy = self.all
+        for c in range(26):
+            easy &= ~self.at_least[c][2]
+        for cha in rare_letters:
+            easy &= ~self.at_least[ord(cha) - 97][1]
+        if difficulty == "简单":
+            return easy
+        if difficulty == "困难":
+            return self.all & ~easy
+        raise ValueError(difficulty)
+
+    def pick(self, mask: int) -> Optional[Tuple[str, str]]:
+        """从位图中等概率取一个单词，返回 (单词, 释义)"""
+        bits = bin(mask)[:1:-1]  # 低位在前
+        total = bits.count("1")
+        if not total:
+            return None
+        k = random.randrange(total)
+        i = -1
+        for _ in range(k + 1):
+            i = bits.index("1", i + 1)
+        word = self.words[i]
+        return word, self.index.meaning(word)
+
+
+_indexes: Dict[Tuple[str, int], CandidateIndex] = {}
+_lock = threading.Lock()
+
+
+def get_candidate_index(dic_name: str, length: int) -> CandidateIndex:
+    # 词典未知（如旧版本保存的游戏）时使用全量词表
+    if dic_name not in dic_list:
+        dic_name = ALL_WORDS
+    key = (dic_name, length)
+    index = _indexes.get(key, None)
+    if index is None:
+        with _lock:
+            index = _indexes.get(key, None)
+            if index is None:
+                index = CandidateIndex(dic_name, length)
+                _indexes[key] = index
+    return index
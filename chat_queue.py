@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLocks(object):
+    """按会话串行处理消息：同一会话的指令按到达顺序逐条执行，不同会话互不影响
+
+    锁只在有消息等待时存在，会话空闲后即删除。
+    """
+
+    def __init__(self):
+        self.locks: Dict[str, List] = {}  # cid -> [锁, 持有及等待者数量]
+
+    @asynccontextmanager
+    async def hold(self, cid: str):
+        entry = self.locks.get(cid, None)
+        if entry is None:
+            entry = self.locks[cid] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[cid]
+
+
+class BoardUpdates(object):
+    """合并同一会话连续猜测后的棋盘图片
+
+    猜测被接受后只登记“需要更新”，等待 delay 秒（为 0 时不等待）后绘制一次当前局面；
+    绘制、发送期间又有新的猜测时，结束后再补发一张，因此一轮连续猜测只发送一两张图片。
+    游戏结束时取消未发送的更新，由结束消息带上最终棋盘。
+    """
+
+    def __init__(self, delay: float, send: Callable[[str, Any], Awaitable]):
+        self.delay = delay
+        self.send = send  # send(cid, context)，context 为最近一次登记时给出的上下文
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.contexts: Dict[str, Any] = {}  # 等待发送的会话 -> 最新上下文
+
+    def schedule(self, cid: str, context: Any):
+        self.contexts[cid] = context
+        if cid not in self.tasks:
+            self.tasks[cid] = asyncio.get_running_loop().create_task(self.run(cid))
+
+    def cancel(self, cid: str):
+        self.contexts.pop(cid, None)
+        task = self.tasks.pop(cid, None)
+        if task is not None:
+            task.cancel()
+
+    async def run(self, cid: str):
+        try:
+            if self.delay > 0:
+                await asyncio.sleep(self.delay)
+            while cid in self.contexts:
+                context = self.contexts.pop(cid)
+                try:
+                    await self.send(cid, context)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception(f"发送 {cid} 的棋盘失败")
+        finally:
+            if self.tasks.get(cid, None) is asyncio.current_task():
+                del self.tasks[cid]
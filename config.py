@@ -0,0 +1,60 @@
+# 插件运行参数，按需修改
+
+# 词库、enchant、联想索引等均在首次使用时加载；启动后可在后台提前预加载
+WARMUP_DELAY = 30  # 启动后多少秒开始预加载，None 表示不预加载
+
+# 分片游戏引擎：大于 0 时按会话把游戏分到若干个子进程中处理（仅支持 Linux 等可 fork 的系统），0 表示在本进程内处理
+ENGINE_WORKERS = 0
+
+# 绘图与编码在线程池/进程池中执行，避免阻塞事件循环
+RENDER_EXECUTOR = "thread"  # "thread" 或 "process"
+RENDER_WORKERS = 2  # 池中线程/进程数
+RENDER_QUEUE_SIZE = 32  # 同时等待绘图的任务上限，超出时直接拒绝
+
+# 图片输出
+IMAGE_PALETTE = True  # 以共享调色板的 P 模式绘制，关闭则为 RGB
+IMAGE_FORMAT = "png"  # "png" 或 "webp"（需客户端支持）
+PNG_COMPRESS_LEVEL = 6  # 0-9，越大越小越慢
+WEBP_LOSSLESS = True
+WEBP_QUALITY = 80  # 无损时表示压缩力度，有损时表示画质
+IMAGE_CACHE_BYTES = 8 * 1024 * 1024  # 相同局面的图片缓存上限（字节），0 表示不缓存
+
+# 图片发送方式："base64" 内嵌在消息中；"file" 写入本地目录后以 file:// 引用（协议端需在同一台机器上）
+IMAGE_DELIVERY = "base64"
+IMAGE_FILE_DIR = "data/images"  # 相对于插件目录，也可填绝对路径（如 /dev/shm/wordle）
+IMAGE_FILE_MAX_BYTES = 64 * 1024 * 1024  # 目录总大小上限
+IMAGE_FILE_MAX_AGE = 600  # 超过多少秒未使用的图片被删除
+IMAGE_FILE_CLEAN_INTERVAL = 60  # 清理间隔（秒）
+
+# 单词合法性检查
+LEGAL_OFFLINE = False  # 不使用 enchant，仅认可内置词库与下方词表中的单词；未安装 enchant 时自动开启
+LEGAL_CACHE_SIZE = 4096  # enchant 查询结果的 LRU 容量
+LEGAL_EXTRA_WORDS = None  # 额外认可的词表文件路径，每行一个单词
+
+# 连续猜测时合并棋盘图片：猜测被接受后等待多少秒再绘制并发送当前局面
+# 为 0 时立即绘制，只合并绘制、发送期间到达的猜测；设为正数可在猜测密集的群中进一步减少图片，但每次猜测都会多等这么久
+BOARD_COALESCE_DELAY = 0
+
+# 游戏超时
+GAME_TIMEOUT = 300  # 无人操作多少秒后结束游戏
+TIMEOUT_SWEEP_INTERVAL = 5  # 检查超时的间隔（秒）
+
+# 游戏状态持久化，重启后恢复进行中的游戏
+STORE_ENABLED = True
+STORE_PATH = "data/games.sqlite3"  # 相对于插件目录
+STORE_FLUSH_INTERVAL = 2  # 批量写入间隔（秒）
+
+# “最佳下一步”提示（需要 numpy）
+SOLVER_CACHE_DIR = "data/solver"  # 反馈矩阵缓存目录，相对于插件目录
+
+# 运行指标（耗时直方图、开局/猜测/超时计数、缓存命中、内存），修改后需重启
+METRICS_ENABLED = False
+METRICS_FILE = None  # 定期写入的 Prometheus 文本文件，相对于插件目录，如 "data/wordle.prom"；None 表示不写
+METRICS_FILE_INTERVAL = 15  # 写入间隔（秒）
+METRICS_ROUTE = None  # 在 HoshinoBot 的 HTTP 服务上提供指标的路径，如 "/wordle/metrics"；None 表示不提供
+
+# 管理员指令“猜单词性能分析 [秒数]”“猜单词内存分析 [秒数]”，报告写入下方目录
+PROFILE_DIR = "data/profiles"  # 相对于插件目录
+PROFILE_INTERVAL = 0.005  # 调用栈采样间隔（秒）
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
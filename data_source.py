@@ -1,10 +1,16 @@
+import threading
 from enum import Enum
+from functools import partial
 from io import BytesIO
-from PIL import Image, ImageDraw
 from PIL.Image import Image as IMG
-from typing import Tuple, List, Optional
+from string import ascii_lowercase
+from typing import Tuple, List, Optional, Dict, Set
 
-from .utils import legal_word, load_font, save_png
+from . import config
+from .utils import legal_word, load_font, save_image
+from .tiles import get_atlas, build_palette
+from .candidates import get_candidate_index
+from .image_cache import image_cache
 
 min_len = 4
 max_len = 10
@@ -17,16 +23,10 @@ class GuessResult(Enum):
     ILLEGAL = 3  # 单词不合法
 
 
-class Wordle(object):
-    def __init__(self, word: str, meaning: str):
-        self.word: str = word  # 单词
-        self.meaning: str = meaning  # 单词释义
-        self.result = f"【单词】：{self.word}\n【释义】：{self.meaning}"
-        self.word_lower: str = self.word.lower()
-        self.length: int = len(word)  # 单词长度
-        self.rows: int = max(self.length + 1, 11 - self.length)  # 可猜次数
-        self.guessed_words: List[str] = []  # 记录已猜单词
+class Theme(object):
+    """所有游戏共用的、不可变的绘图参数"""
 
+    def __init__(self):
         self.block_size = (40, 40)  # 文字块尺寸
         self.block_padding = (10, 10)  # 文字块之间间距
         self.padding = (20, 20)  # 边界间距
@@ -44,44 +44,210 @@ class Wordle(object):
         self.bg_color = (255, 255, 255)  # 背景颜色
         self.font_color = (255, 255, 255)  # 文字颜色
         self.unknown_color = (15, 190, 192)
+        self.atlas = get_atlas(self.font, self.block_size, self.border_width, self.get_palette())
+
+    def get_palette(self):
+        if not config.IMAGE_PALETTE:
+            return None
+        return build_palette((
+            (self.bg_color, self.grey_color),
+            (self.correct_color, self.font_color),
+            (self.exist_color, self.font_color),
+            (self.wrong_color, self.font_color),
+            (self.unknown_color, self.font_color),
+        ))
+
+
+_theme: Optional[Theme] = None
+
+
+def get_theme() -> Theme:
+    global _theme
+    if _theme is None:
+        _theme = Theme()
+    return _theme
+
+
+def _letters(mask: int) -> Set[str]:
+    return {ascii_lowercase[i] for i in range(26) if mask >> i & 1}
+
+
+class Constraints(object):
+    """已猜测单词给出的全部约束，每接受一次猜测增量更新一次"""
+
+    __slots__ = ("colors", "patterns", "green", "green_count", "min_count", "max_count", "excluded_mask", "seen_mask")
+
+    WRONG, EXIST, CORRECT = 0, 1, 2
+
+    def __init__(self, length: int, theme: Theme):
+        self.colors = (theme.wrong_color, theme.exist_color, theme.correct_color)
+        self.patterns: List[bytes] = []  # 每个已猜单词的颜色，按 WRONG/EXIST/CORRECT 编码
+        self.green: List[Optional[str]] = [None] * length  # 已确定位置的字母
+        self.green_count = 0
+        self.min_count: Dict[str, int] = {}  # 字母在原单词中至少出现的次数
+        self.max_count: Dict[str, int] = {}  # 字母在原单词中至多出现的次数（出现过灰色块时才确定）
+        self.excluded_mask = 0  # 已被排除的字母，按位记录
+        self.seen_mask = 0  # 猜过的字母，按位记录
+
+    def update(self, word: str, colors: List[Tuple[int, int, int]]):
+        pattern = bytes(self.colors.index(c) for c in colors)
+        self.patterns.append(pattern)
+        counts = {}
+        greyed = set()
+        for j, cha in enumerate(word):
+            self.seen_mask |= 1 << (ord(cha) - 97)
+            if pattern[j] == self.CORRECT and self.green[j] is None:
+                self.green[j] = cha
+                self.green_count += 1
+            if pattern[j] == self.WRONG:
+                greyed.add(cha)
+            else:
+                counts[cha] = counts.get(cha, 0) + 1
+        for cha, cnt in counts.items():
+            self.min_count[cha] = max(self.min_count.get(cha, 0), cnt)
+        for cha in greyed:
+            self.max_count[cha] = counts.get(cha, 0)
+            if not counts.get(cha, 0):
+                self.excluded_mask |= 1 << (ord(cha) - 97)
+
+    def copy(self) -> "Constraints":
+        other = Constraints.__new__(Constraints)
+        other.colors = self.colors
+        other.patterns = list(self.patterns)
+        other.green = list(self.green)
+        other.green_count = self.green_count
+        other.min_count = dict(self.min_count)
+        other.max_count = dict(self.max_count)
+        other.excluded_mask = self.excluded_mask
+        other.seen_mask = self.seen_mask
+        return other
+
+    def pattern_colors(self, i: int) -> List[Tuple[int, int, int]]:
+        return [self.colors[c] for c in self.patterns[i]]
+
+    @property
+    def excluded(self) -> Set[str]:
+        return _letters(self.excluded_mask)
+
+    @property
+    def unseen(self) -> Set[str]:
+        return _letters(~self.seen_mask & ((1 << 26) - 1))
+
+    def yellow_letters(self) -> List[str]:
+        # 已知存在、但还有未确定位置的字母，按出现次数展开
+        greens = {}
+        for cha in self.green:
+            if cha is not None:
+                greens[cha] = greens.get(cha, 0) + 1
+        letters = []
+        for cha, cnt in sorted(self.min_count.items()):
+            letters += [cha] * max(0, cnt - greens.get(cha, 0))
+        return letters
+
+    def found_letters(self) -> Set[str]:
+        return set(self.min_count)
+
+
+class Wordle(object):
+    __slots__ = ("word", "meaning", "dic", "guesses", "state", "board", "painted", "lock", "render_lock", "theme")
+
+    def __init__(self, word: str, meaning: str, dic: str = ""):
+        self.word: str = word  # 单词
+        self.meaning: str = meaning  # 单词释义
+        self.dic: str = dic  # 出题词典
+        self.guesses = bytearray()  # 已猜单词，按单词长度定长拼接
+        self.board: Optional[IMG] = None  # 常驻棋盘，绘图时补画新增的行
+        self.painted = 0  # 常驻棋盘上已画出的猜测数
+        self.theme = get_theme()  # 共享的绘图参数
+        self.state = Constraints(self.length, self.theme)  # 每次猜测后增量更新的约束
+        # lock 只保护 guesses 与 state 的更新和复制，事件循环中的猜测不会等待绘图；
+        # render_lock 保护常驻棋盘，只在绘图线程之间互斥
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock()
+
+    def __getstate__(self):
+        # 进程池绘图时 pickle 整个对象，共享的绘图参数、锁不随之传递，棋盘在子进程中重新绘制
+        with self.lock:
+            return {"word": self.word, "meaning": self.meaning, "dic": self.dic, "guesses": bytearray(self.guesses), "state": self.state.copy()}
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        self.theme = get_theme()
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock()
+        self.board = None
+        self.painted = 0
+
+    def snapshot(self) -> "Wordle":
+        # 绘图用的局面副本，之后的绘制不再读取会被猜测修改的状态
+        view = Wordle.__new__(Wordle)
+        view.word, view.meaning, view.dic, view.theme = self.word, self.meaning, self.dic, self.theme
+        with self.lock:
+            view.guesses = bytearray(self.guesses)
+            view.state = self.state.copy()
+        view.board, view.painted, view.lock, view.render_lock = None, 0, None, None
+        return view
+
+    @property
+    def word_lower(self) -> str:
+        return self.word.lower()
+
+    @property
+    def length(self) -> int:  # 单词长度
+        return len(self.word)
+
+    @property
+    def rows(self) -> int:  # 可猜次数
+        return max(self.length + 1, 11 - self.length)
+
+    @property
+    def result(self) -> str:
+        return f"【单词】：{self.word}\n【释义】：{self.meaning}"
+
+    @property
+    def guess_count(self) -> int:
+        return len(self.guesses) // self.length
+
+    def guessed_word(self, i: int) -> str:
+        return self.guesses[i * self.length:(i + 1) * self.length].decode("ascii")
+
+    @property
+    def guessed_words(self) -> List[str]:
+        return [self.guessed_word(i) for i in range(self.guess_count)]
 
     def guess(self, word: str) -> Optional[GuessResult]:
         word = word.lower()
         if not legal_word(word):
-            if not legal_word(f'{word[0].upper()}{word[1:]}'):
-                return GuessResult.ILLEGAL
+            return GuessResult.ILLEGAL
 
         if word in self.guessed_words:
             return GuessResult.DUPLICATE
-        self.guessed_words.append(word)
+        self.accept(word)
         if word == self.word_lower:
             return GuessResult.WIN
-        if len(self.guessed_words) == self.rows:
+        if self.guess_count == self.rows:
             return GuessResult.LOSS
 
+    def accept(self, word: str):
+        # 记录一次有效猜测；恢复已保存的游戏时也直接调用，不再检查合法性
+        colors = self.get_color(self.word_lower, word)
+        with self.lock:
+            self.guesses += word.encode("ascii")
+            self.state.update(word, colors)
+
     def draw_block(self, color: Tuple[int, int, int], letter: str, font_color=None, border_color=None) -> IMG:
-        block = Image.new("RGB", self.block_size, (border_color or self.border_color))
-        inner_w = self.block_size[0] - self.border_width * 2
-        inner_h = self.block_size[1] - self.border_width * 2
-        inner = Image.new("RGB", (inner_w, inner_h), color)
-        block.paste(inner, (self.border_width, self.border_width))
-        if len(letter):
-            letter = letter.upper()
-            draw = ImageDraw.Draw(block)
-            letter_size = self.font.getsize(letter)
-            x = (self.block_size[0] - letter_size[0]) / 2
-            y = (self.block_size[1] - letter_size[1]) / 2
-            draw.text((x, y), letter, font=self.font, fill=(font_color or self.font_color))
-        return block
+        # 返回共享的预渲染文字块，仅用于 paste
+        return self.theme.atlas.get(color, letter, font_color or self.theme.font_color, border_color or self.theme.border_color)
 
     def get_color(self, origin_word, guess_word):
-        colors = [self.wrong_color for _ in range(self.length)]
+        colors = [self.theme.wrong_color for _ in range(self.length)]
         char_dict = {}
         for i in range(self.length):
             oc = origin_word[i]
             gc = guess_word[i]
             if oc == gc:
-                colors[i] = self.correct_color
+                colors[i] = self.theme.correct_color
             else:
                 char_dict[oc] = char_dict.get(oc, 0) + 1
         for i in range(self.length):
@@ -89,101 +255,116 @@ class Wordle(object):
             gc = guess_word[i]
             if oc != gc:
                 if char_dict.get(gc, 0):
-                    colors[i] = self.exist_color
+                    colors[i] = self.theme.exist_color
                     char_dict[gc] -= 1
 
         return colors
 
     def generate_canvas(self, col, row):
-        board_w = col * self.block_size[0]
-        board_w += (col - 1) * self.block_padding[0] + 2 * self.padding[0]
-        board_h = row * self.block_size[1]
-        board_h += (row - 1) * self.block_padding[1] + 2 * self.padding[1]
+        board_w = col * self.theme.block_size[0]
+        board_w += (col - 1) * self.theme.block_padding[0] + 2 * self.theme.padding[0]
+        board_h = row * self.theme.block_size[1]
+        board_h += (row - 1) * self.theme.block_padding[1] + 2 * self.theme.padding[1]
         board_size = (board_w, board_h)
-        board = Image.new("RGB", board_size, self.bg_color)
+        board = self.theme.atlas.new_canvas(board_size, self.theme.bg_color)
         return board, board_size
 
     def get_pos(self, col, row):
-        x = self.padding[0] + (self.block_size[0] + self.block_padding[0]) * col
-        y = self.padding[1] + (self.block_size[1] + self.block_padding[1]) * row
+        x = self.theme.padding[0] + (self.theme.block_size[0] + self.theme.block_padding[0]) * col
+        y = self.theme.padding[1] + (self.theme.block_size[1] + self.theme.block_padding[1]) * row
         return (x, y)
 
-    def draw(self) -> BytesIO:
-        board, board_size = self.generate_canvas(self.length, self.rows)
-
-        for i in range(self.rows):
-            if i < len(self.guessed_words):
-                colors = self.get_color(self.word_lower, self.guessed_words[i])
-                word = self.guessed_words[i]
-            else:
-                colors = [self.bg_color for _ in range(self.length)]
-                word = ["" for _ in range(self.length)]
-
-            for j in range(self.length):
-                board.paste(self.draw_block(colors[j], word[j]), self.get_pos(j, i))
+    def draw_row(self, board: IMG, i: int):
+        if i < self.guess_count:
+            colors = self.state.pattern_colors(i)
+            word = self.guessed_word(i)
+        else:
+            colors = [self.theme.bg_color for _ in range(self.length)]
+            word = ["" for _ in range(self.length)]
+
+        for j in range(self.length):
+            board.paste(self.draw_block(colors[j], word[j]), self.get_pos(j, i))
+
+    def draw_board(self, view: Optional["Wordle"] = None) -> IMG:
+        # 在常驻棋盘上补画 view（默认为当前局面）中新增的行，返回其副本；只在绘图线程中调用
+        if view is None:
+            view = self.snapshot()
+        with self.render_lock:
+            if self.board is None:
+                self.board, _ = self.generate_canvas(self.length, self.rows)
+                for i in range(self.rows):
+                    view.draw_row(self.board, i)
+                self.painted = view.guess_count
+            for i in range(self.painted, view.guess_count):
+                view.draw_row(self.board, i)
+            board = self.board.copy()
+            # 另一个绘图任务已按更新的局面画过时，副本上擦去 view 之后的行
+            for i in range(view.guess_count, self.painted):
+                view.draw_row(board, i)
+            self.painted = max(self.painted, view.guess_count)
+        return board
+
+    def image_key(self) -> bytes:
+        # 图片只取决于单词长度、已猜单词及其颜色；猜过之后还要显示词典中剩余的单词数
+        if not self.guess_count:
+            return b"B%d" % self.length
+        return b"B%d:%s:%s:%s" % (self.length, self.dic.encode(), self.guesses, b"".join(self.state.patterns))
 
+    def draw(self) -> BytesIO:
+        # 键与图片都取自同一份局面副本；计算剩余单词数（可能要先建立候选索引）时不持有任何锁
+        view = self.snapshot()
+        key = view.image_key()
+        data = image_cache.get(key)
+        if data is not None:
+            return BytesIO(data)
+        board = self.draw_board(view)
+        hint_board = view.draw_hint_board()
+        if hint_board is not None:
+            all_board = self.theme.atlas.new_canvas((board.width + hint_board.width, max(hint_board.height, board.height)), self.theme.bg_color)
+            all_board.paste(board)
+            all_board.paste(hint_board, (board.width, 0))
+            board = all_board
+        output = save_image(board)
+        image_cache.put(key, output.getvalue())
+        return output
+
+    def draw_hint_board(self) -> Optional[IMG]:
         # 接下来是为提升游戏性做的提示渲染
         hint_row_cnt = 0
         hint_col_cnt = max(min(self.length + 2, max_len), 5)
 
         # 根据所有已猜测结果，已确定位置的字母
-        color_only_green = [self.bg_color for _ in range(self.length)]
-        word_only_green = ["?" for _ in range(self.length)]
-        for guess_word in self.guessed_words:
-            colors = self.get_color(self.word_lower, guess_word)
-            for j in range(self.length):
-                if colors[j] == self.correct_color:
-                    color_only_green[j] = self.correct_color
-                    word_only_green[j] = guess_word[j]
-        if word_only_green.count("?") != self.length:
+        state = self.state
+        color_only_green = [self.theme.bg_color if cha is None else self.theme.correct_color for cha in state.green]
+        word_only_green = ["?" if cha is None else cha for cha in state.green]
+        if state.green_count:
             hint_row_cnt += 1
 
         # 已经被排除的字母
-        word_wrong = []
-        for guess_word in self.guessed_words:
-            for cha in guess_word:
-                if cha not in self.word_lower:
-                    word_wrong.append(cha)
-        word_wrong = list(sorted(set(word_wrong)))
+        word_wrong = sorted(state.excluded)
         if len(word_wrong) > 15:
             word_wrong = [f'{len(word_wrong)}']
         if len(word_wrong):
             hint_row_cnt += (len(word_wrong) + 2 - 1) // hint_col_cnt + 1
 
         # 所有已猜测结果中均未出现的字母
-        word_26 = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z"]
-        word_appear = []
-        for guess_word in self.guessed_words:
-            for cha in guess_word:
-                word_appear.append(cha)
-        word_never_appear = list(sorted(set(word_26) - set(word_appear)))
+        word_never_appear = sorted(state.unseen)
         if len(word_never_appear) > 13:
             word_never_appear = [f'{len(word_never_appear)}']
         if len(word_never_appear):
             hint_row_cnt += (len(word_never_appear) + 2 - 1) // hint_col_cnt + 1
 
         # 根据所有已猜测结果，不确定位置但知道存在的字母
-        word_yellow = {}
-        for guess_word in self.guessed_words:
-            word_yellow_g = {}
-            colors = self.get_color(self.word_lower, guess_word)
-            for j in range(self.length):
-                if colors[j] != self.wrong_color:
-                    word_yellow_g[guess_word[j]] = word_yellow_g.get(guess_word[j], 0) + 1
-            for cha in word_yellow_g:
-                word_yellow[cha] = max(word_yellow.get(cha, 0), word_yellow_g[cha])
-        for cha in word_only_green:
-            if cha in word_yellow:
-                word_yellow[cha] -= 1
-                if word_yellow[cha] == 0:
-                    word_yellow.pop(cha)
-        word_yellow_item = sorted(word_yellow.items())
-        word_yellow = []
-        for k, v in word_yellow_item:
-            word_yellow += [k for _ in range(v)]
+        word_yellow = state.yellow_letters()
         if len(word_yellow):
             hint_row_cnt += (len(word_yellow) + 2 - 1) // hint_col_cnt + 1
 
+        # 词典中仍与所有反馈一致的单词数
+        remaining = []
+        if self.guess_count:
+            remaining = list(str(self.remaining_count()))
+            hint_row_cnt += (len(remaining) + 2 - 1) // hint_col_cnt + 1
+
         # print()
         # print(f'green= {word_only_green}')
         # print(f'yellow={word_yellow}')
@@ -192,11 +373,11 @@ class Wordle(object):
         # print()
 
         if hint_row_cnt == 0:
-            return save_png(board)
+            return None
 
         # 改为获取真实宽度
         hint_col_cnt = 0
-        if word_only_green.count("?") != self.length:
+        if state.green_count:
             hint_col_cnt = max(hint_col_cnt, self.length)
         if len(word_yellow):
             hint_col_cnt = max(hint_col_cnt, len(word_yellow) + 2)
@@ -204,76 +385,88 @@ class Wordle(object):
             hint_col_cnt = max(hint_col_cnt, len(word_wrong) + 2)
         if len(word_never_appear):
             hint_col_cnt = max(hint_col_cnt, len(word_never_appear) + 2)
+        if len(remaining):
+            hint_col_cnt = max(hint_col_cnt, len(remaining) + 2)
         hint_col_cnt = min(self.length + 2, max_len, hint_col_cnt)
 
         hint_board, hint_board_size = self.generate_canvas(hint_col_cnt, hint_row_cnt)
         hint_now_row = 0
-        if word_only_green.count("?") != self.length:
+        if state.green_count:
             for j in range(self.length):
                 hint_board.paste(self.draw_block(color_only_green[j], word_only_green[j]), self.get_pos(j, hint_now_row))
             hint_now_row += 1
 
         if len(word_yellow):
-            hint_board.paste(self.draw_block(self.yellow_color, ""), self.get_pos(0, hint_now_row))
-            hint_board.paste(self.draw_block(self.bg_color, "=", self.grey_color, self.bg_color), self.get_pos(1, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.yellow_color, ""), self.get_pos(0, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.bg_color, "=", self.theme.grey_color, self.theme.bg_color), self.get_pos(1, hint_now_row))
             now_col = 1
             for cha in word_yellow:
                 now_col += 1
                 if now_col == hint_col_cnt:
                     now_col = 0
                     hint_now_row += 1
-                hint_board.paste(self.draw_block(self.yellow_color, cha), self.get_pos(now_col, hint_now_row))
+                hint_board.paste(self.draw_block(self.theme.yellow_color, cha), self.get_pos(now_col, hint_now_row))
             hint_now_row += 1
 
         if len(word_wrong):
-            hint_board.paste(self.draw_block(self.grey_color, ""), self.get_pos(0, hint_now_row))
-            hint_board.paste(self.draw_block(self.bg_color, "=", self.grey_color, self.bg_color), self.get_pos(1, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.grey_color, ""), self.get_pos(0, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.bg_color, "=", self.theme.grey_color, self.theme.bg_color), self.get_pos(1, hint_now_row))
             now_col = 1
             for cha in word_wrong:
                 now_col += 1
                 if now_col == hint_col_cnt:
                     now_col = 0
                     hint_now_row += 1
-                hint_board.paste(self.draw_block(self.grey_color, cha), self.get_pos(now_col, hint_now_row))
+                hint_board.paste(self.draw_block(self.theme.grey_color, cha), self.get_pos(now_col, hint_now_row))
             hint_now_row += 1
 
         if len(word_never_appear):
-            hint_board.paste(self.draw_block(self.unknown_color, "?"), self.get_pos(0, hint_now_row))
-            hint_board.paste(self.draw_block(self.bg_color, "=", self.grey_color, self.bg_color), self.get_pos(1, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.unknown_color, "?"), self.get_pos(0, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.bg_color, "=", self.theme.grey_color, self.theme.bg_color), self.get_pos(1, hint_now_row))
             now_col = 1
             for cha in word_never_appear:
                 now_col += 1
                 if now_col == hint_col_cnt:
                     now_col = 0
                     hint_now_row += 1
-                hint_board.paste(self.draw_block(self.unknown_color, cha), self.get_pos(now_col, hint_now_row))
+                hint_board.paste(self.draw_block(self.theme.unknown_color, cha), self.get_pos(now_col, hint_now_row))
+            hint_now_row += 1
+
+        if len(remaining):
+            hint_board.paste(self.draw_block(self.theme.bg_color, "#", self.theme.grey_color), self.get_pos(0, hint_now_row))
+            hint_board.paste(self.draw_block(self.theme.bg_color, "=", self.theme.grey_color, self.theme.bg_color), self.get_pos(1, hint_now_row))
+            now_col = 1
+            for cha in remaining:
+                now_col += 1
+                if now_col == hint_col_cnt:
+                    now_col = 0
+                    hint_now_row += 1
+                hint_board.paste(self.draw_block(self.theme.bg_color, cha, self.theme.grey_color), self.get_pos(now_col, hint_now_row))
+
+        return hint_board
 
-        # all_board = Image.new("RGB", (max(board_size[0], hint_board_size[0]), hint_board_size[1] + board_size[1]), self.bg_color)
-        # all_board.paste(board)
-        # all_board.paste(hint_board, (0, board_size[1]))
-        all_board = Image.new("RGB", (board_size[0] + hint_board_size[0], max(hint_board_size[1], board_size[1])), self.bg_color)
-        all_board.paste(board)
-        all_board.paste(hint_board, (board_size[0], 0))
-        return save_png(all_board)
+    def remaining_count(self) -> int:
+        # 位图索引上的几次按位与，每次绘制时重新计算
+        index = get_candidate_index(self.dic, self.length)
+        return index.count((self.guessed_word(i) for i in range(self.guess_count)), self.state.patterns)
 
     def get_hint(self) -> str:
-        letters = set()
-        for word in self.guessed_words:
-            for letter in word:
-                if letter in self.word_lower:
-                    letters.add(letter)
+        letters = self.state.found_letters()
         return "".join([i if i in letters else "*" for i in self.word_lower])
 
     def draw_hint(self, hint: str) -> BytesIO:
-        board_w = self.length * self.block_size[0]
-        board_w += (self.length - 1) * self.block_padding[0] + 2 * self.padding[0]
-        board_h = self.block_size[1] + 2 * self.padding[1]
-        board = Image.new("RGB", (board_w, board_h), self.bg_color)
+        return image_cache.fetch(b"H" + hint.encode("ascii"), partial(self.render_hint, hint))
+
+    def render_hint(self, hint: str) -> BytesIO:
+        board_w = self.length * self.theme.block_size[0]
+        board_w += (self.length - 1) * self.theme.block_padding[0] + 2 * self.theme.padding[0]
+        board_h = self.theme.block_size[1] + 2 * self.theme.padding[1]
+        board = self.theme.atlas.new_canvas((board_w, board_h), self.theme.bg_color)
 
         for i in range(len(hint)):
             letter = hint[i].replace("*", "")
-            color = self.correct_color if letter else self.bg_color
-            x = self.padding[0] + (self.block_size[0] + self.block_padding[0]) * i
-            y = self.padding[1]
+            color = self.theme.correct_color if letter else self.theme.bg_color
+            x = self.theme.padding[0] + (self.theme.block_size[0] + self.theme.block_padding[0]) * i
+            y = self.theme.padding[1]
             board.paste(self.draw_block(color, letter), (x, y))
-        return save_png(board)
+        return save_image(board)
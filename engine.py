@@ -0,0 +1,273 @@
+"""
+可选的分片游戏引擎进程（config.ENGINE_WORKERS > 0 时启用）。
+
+主进程只负责收发消息：游戏指令按会话 id 分片转发给固定的工作进程，
+工作进程持有该分片的游戏、词库、绘图池与图片缓存，执行与单进程模式完全相同的处理流程，
+需要发送的消息（含超时、合并后的棋盘）再交回主进程发出。
+
+每个工作进程与主进程之间一条 multiprocessing.Pipe，传递 pickle 后的元组：
+    主 -> 工作  ("call", 请求号, 事件字段, argv, no_response)
+    工作 -> 主  ("send", 事件字段, 消息, kwargs)
+                ("length", group_id, user_id, 单词长度或 None)   会话的游戏开始/结束，供主进程快速过滤消息
+                ("done", 请求号)                               指令处理完毕，其间的消息均已在此之前送出
+"""
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import signal
+import threading
+import zlib
+from multiprocessing.connection import Connection
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+event_fields = ("post_type", "message_type", "self_id", "group_id", "user_id")
+
+
+def event_target(ev) -> Dict[str, Any]:
+    # 发送消息所需的最少字段，接收方据此重建 CQEvent
+    return {k: ev.get(k) for k in event_fields}
+
+
+def shard_of(cid: str, count: int) -> int:
+    return zlib.crc32(cid.encode()) % count
+
+
+class FinishedException(Exception):
+    """RelayBot.finish 结束当前指令"""
+
+
+class EngineUnavailable(Exception):
+    """会话所在的工作进程已退出，正在重启"""
+
+
+class WorkerLink(object):
+    """工作进程一侧的管道，只在工作进程的事件循环线程中使用"""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+
+    def put(self, message: tuple):
+        self.conn.send(message)
+
+
+class RelayBot(object):
+    """工作进程中代替 HoshinoBot：消息交回主进程发送"""
+
+    def __init__(self, link: WorkerLink):
+        self.link = link
+
+    async def send(self, ev, message, **kwargs):
+        self.link.put(("send", event_target(ev), str(message), kwargs))
+
+    async def finish(self, ev, message="", **kwargs):
+        if message:
+            await self.send(ev, message, **kwargs)
+        raise FinishedException()
+
+
+def worker_main(conn: Connection, inherited: List[Connection], package: str, index: int, count: int):
+    # fork 出的子进程：不处理主进程的信号，由主进程关闭管道通知退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.set_wakeup_fd(-1)
+    # 关闭继承来的主进程一端，否则主进程关闭管道时这里收不到 EOF
+    for c in inherited:
+        c.close()
+    plugin = importlib.import_module(package)
+    asyncio.run(serve(plugin, conn, index, count))
+
+
+async def serve(plugin, conn: Connection, index: int, count: int):
+    loop = asyncio.get_running_loop()
+    link = WorkerLink(conn)
+    bot = RelayBot(link)
+    plugin.engines = None
+    plugin.engine_link = link
+    await plugin.restore_games(bot, lambda cid: shard_of(cid, count) == index)
+    plugin.schedule_warm_up()
+
+    async def call(req: int, target: Dict[str, Any], argv: List[str], no_response: bool):
+        try:
+            await plugin.handle_wordle(bot, plugin.CQEvent(target), argv, no_response)
+        except FinishedException:
+            pass
+        except Exception:
+            logger.exception(f"引擎进程 {index} 处理 {argv} 失败")
+        link.put(("done", req))
+
+    closed = loop.create_future()
+
+    def on_readable():
+        try:
+            _, req, target, argv, no_response = conn.recv()
+        except EOFError:
+            loop.remove_reader(conn.fileno())
+            closed.set_result(None)
+            return
+        loop.create_task(call(req, target, argv, no_response))
+
+    loop.add_reader(conn.fileno(), on_readable)
+    await closed
+    if plugin.store:
+        plugin.store.close()
+
+
+class EnginePool(object):
+    """主进程一侧：启动工作进程、按会话转发指令并发出工作进程交回的消息
+
+    工作进程意外退出时，清除它报告过的会话长度，restart_delay 秒后重新启动；
+    新进程从存档恢复该分片的游戏，并重新报告各会话的长度。
+    """
+
+    restart_delay = 1.0
+
+    def __init__(
+        self,
+        package: str,
+        workers: int,
+        on_send: Callable[[Dict[str, Any], str, Dict[str, Any]], Awaitable],
+        on_length: Callable[[Optional[int], Optional[int], Optional[int]], None],
+    ):
+        self.package = package
+        self.workers = workers
+        self.on_send = on_send
+        self.on_length = on_length
+        self.conns: List[Optional[Connection]] = [None] * workers  # 已退出的工作进程为 None
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.outbox: List[asyncio.Queue] = []  # 每个工作进程交回的消息按顺序逐条处理
+        self.active: List[Set[Tuple[Optional[int], Optional[int]]]] = [set() for _ in range(workers)]  # 有游戏的 (群号, QQ号)
+        self.tasks: List[asyncio.Task] = []
+        self.restarts: Dict[int, asyncio.Task] = {}
+        self.waiting: Dict[int, Tuple[int, asyncio.Future]] = {}  # 请求号 -> (工作进程序号, 结果)
+        self.seq = 0
+        self.closing = False
+
+    def spawn(self, i: int) -> Tuple[Connection, multiprocessing.Process]:
+        # 在没有运行中事件循环的线程里 fork，子进程才能创建自己的事件循环
+        ctx = multiprocessing.get_context("fork")
+        parent_conn, child_conn = ctx.Pipe()
+        inherited = [c for c in self.conns if c is not None] + [parent_conn]
+        process = ctx.Process(
+            target=worker_main,
+            args=(child_conn, inherited, self.package, i, self.workers),
+            name=f"wordle-engine-{i}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return parent_conn, process
+
+    async def launch(self, i: int):
+        loop = asyncio.get_running_loop()
+        # 不能借用线程池 fork：子进程退出时会等待继承来的线程池线程，其中包括自己
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.spawn(i)), name="wordle-engine-spawn")
+        thread.start()
+        await loop.run_in_executor(None, thread.join)
+        if not result:
+            raise RuntimeError(f"启动引擎进程 {i} 失败")
+        self.conns[i], self.processes[i] = result[0]
+        loop.add_reader(self.conns[i].fileno(), self.on_readable, i)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for i in range(self.workers):
+            self.outbox.append(asyncio.Queue())
+            self.tasks.append(loop.create_task(self.deliver(i)))
+            await self.launch(i)
+
+    async def call(self, cid: str, target: Dict[str, Any], argv: List[str], no_response: bool):
+        i = shard_of(cid, self.workers)
+        conn = self.conns[i]
+        if conn is None:
+            raise EngineUnavailable()
+        self.seq += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.seq] = (i, future)
+        try:
+            conn.send(("call", self.seq, target, argv, no_response))
+        except OSError as e:
+            # 进程已退出，但尚未读到 EOF
+            del self.waiting[self.seq]
+            raise EngineUnavailable() from e
+        await future
+
+    def on_readable(self, i: int):
+        try:
+            message = self.conns[i].recv()
+        except EOFError:
+            self.on_exit(i)
+            return
+        if message[0] == "length":
+            _, group_id, user_id, length = message
+            if length is None:
+                self.active[i].discard((group_id, user_id))
+            else:
+                self.active[i].add((group_id, user_id))
+            self.on_length(group_id, user_id, length)
+        else:
+            self.outbox[i].put_nowait(message)
+
+    def on_exit(self, i: int):
+        loop = asyncio.get_running_loop()
+        logger.error(f"引擎进程 {i} 已退出，{self.restart_delay} 秒后重启")
+        conn = self.conns[i]
+        loop.remove_reader(conn.fileno())
+        conn.close()
+        self.conns[i] = None
+        # 不再有回复，结束所有等待该进程的指令
+        for seq, (j, future) in list(self.waiting.items()):
+            if j == i:
+                del self.waiting[seq]
+                future.set_result(None)
+        # 该分片的游戏随进程丢失，直到重启后从存档恢复
+        for group_id, user_id in self.active[i]:
+            self.on_length(group_id, user_id, None)
+        self.active[i].clear()
+        if not self.closing and i not in self.restarts:
+            self.restarts[i] = loop.create_task(self.restart(i))
+
+    async def restart(self, i: int):
+        try:
+            await asyncio.sleep(self.restart_delay)
+            process = self.processes[i]
+            if process is not None:
+                await asyncio.get_running_loop().run_in_executor(None, process.join, 5)
+            await self.launch(i)
+            logger.info(f"引擎进程 {i} 已重启")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"重启引擎进程 {i} 失败")
+        finally:
+            self.restarts.pop(i, None)
+
+    async def deliver(self, i: int):
+        while True:
+            message = await self.outbox[i].get()
+            if message[0] == "done":
+                _, future = self.waiting.pop(message[1], (None, None))
+                if future is not None and not future.done():
+                    future.set_result(None)
+                continue
+            _, target, text, kwargs = message
+            try:
+                await self.on_send(target, text, kwargs)
+            except Exception:
+                logger.exception(f"发送引擎进程 {i} 的消息失败")
+
+    async def close(self):
+        # 关闭管道后工作进程写回未保存的游戏并退出
+        loop = asyncio.get_running_loop()
+        self.closing = True
+        for task in self.tasks + list(self.restarts.values()):
+            task.cancel()
+        for conn in self.conns:
+            if conn is not None:
+                loop.remove_reader(conn.fileno())
+                conn.close()
+        for process in self.processes:
+            if process is not None:
+                await loop.run_in_executor(None, process.join, 5)
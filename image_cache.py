@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Optional
+
+from . import config
+
+
+class ImageCache(object):
+    """按绘图输入寻址的图片缓存，按编码后的字节数做 LRU 淘汰
+
+    键由调用方给出，须完整决定图片内容（如单词长度、已猜单词与颜色、提示串）；
+    值为编码后的图片，命中时既不绘图也不编码。绘图池中的多个线程共用，读写均加锁。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self.size = 0  # 缓存中图片的总字节数
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        if self.max_bytes <= 0:
+            return None
+        with self.lock:
+            data = self.entries.get(key, None)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return data
+
+    def put(self, key: bytes, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def fetch(self, key: bytes, render: Callable[[], BytesIO]) -> BytesIO:
+        # 未命中时调用 render 并缓存结果
+        data = self.get(key)
+        if data is None:
+            data = render().getvalue()
+            self.put(key, data)
+        return BytesIO(data)
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+image_cache = ImageCache(config.IMAGE_CACHE_BYTES)
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class ImageFiles(object):
+    """以内容哈希命名的本地图片目录，消息中以 file:// 引用图片，省去 base64 编码
+
+    相同的图片只写一次，再次使用时刷新修改时间；定期删除超过 max_age 秒未使用的文件，
+    总大小超过 max_bytes 时再从最久未使用的开始删除。
+    目录需能被 go-cqhttp 等协议端直接读取（同一台机器），可放在 tmpfs 上。
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, max_age: float, interval: float):
+        self.directory = directory.resolve()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+
+    def store(self, data: bytes, suffix: str) -> str:
+        path = self.directory / f"{hashlib.sha1(data).hexdigest()}.{suffix}"
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return path.as_uri()
+
+    def clean(self) -> int:
+        # 返回删除的文件数
+        try:
+            entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(self.directory) if e.is_file()]
+        except FileNotFoundError:
+            return 0
+        entries.sort()
+        deadline = time.time() - self.max_age
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= deadline and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.clean)
+            except Exception:
+                logger.exception("清理图片目录失败")
+            await asyncio.sleep(self.interval)
+
+
+image_files = (
+    ImageFiles(
+        Path(__file__).parent / config.IMAGE_FILE_DIR,
+        config.IMAGE_FILE_MAX_BYTES,
+        config.IMAGE_FILE_MAX_AGE,
+        config.IMAGE_FILE_CLEAN_INTERVAL,
+    )
+    if config.IMAGE_DELIVERY == "file"
+    else None
+)
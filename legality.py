@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from . import config
+from .word_index import dic_list, get_word_index, ALL_WORDS
+
+enchant = None  # 首次检查单词时才导入，导入本身就要几十毫秒
+
+
+def load_enchant():
+    global enchant
+    if enchant is None:
+        try:
+            import enchant as module
+        except ImportError:
+            return None
+        enchant = module
+    return enchant
+
+
+class LegalityChecker(object):
+    """单词合法性检查
+
+    1. 内置词库中的全部单词预先放入集合，直接判定合法；
+    2. 其余单词查询 enchant，结果放入有界 LRU；
+    3. 离线模式（或未安装 enchant）时仅使用预置集合及 config.LEGAL_EXTRA_WORDS。
+    """
+
+    def __init__(self, offline: bool, cache_size: int, extra_words: Optional[str] = None):
+        self.offline = offline
+        self.cache_size = cache_size
+        self.extra_words = extra_words
+        self.known: Optional[Set[str]] = None
+        self.cache: "OrderedDict[str, bool]" = OrderedDict()
+        self.dicts = []
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"known": 0, "cache_hit": 0, "enchant": 0, "offline_miss": 0}
+
+    def load(self):
+        with self.lock:
+            if self.known is not None:
+                return
+            known = set()
+            for dic_name in dic_list + [ALL_WORDS]:
+                index = get_word_index(dic_name)
+                for words in index.by_len.values():
+                    known.update(w.lower() for w in words)
+            if self.extra_words:
+                with Path(self.extra_words).open("r", encoding="utf-8") as f:
+                    known.update(line.strip().lower() for line in f if line.strip())
+            if not self.offline and load_enchant() is None:
+                self.offline = True
+            if not self.offline:
+                self.dicts = [enchant.Dict("en"), enchant.Dict("en_US")]
+            self.known = known
+
+    def enchant_check(self, word: str) -> bool:
+        # 同时接受首字母大写的形式（专有名词）
+        for w in (word, f'{word[0].upper()}{word[1:]}'):
+            for d in self.dicts:
+                if d.check(w):
+                    return True
+        return False
+
+    def check(self, word: str) -> bool:
+        if self.known is None:
+            self.load()
+        word = word.lower()
+        if word in self.known:
+            self.stats["known"] += 1
+            return True
+        if self.offline:
+            self.stats["offline_miss"] += 1
+            return False
+        result = self.cache.get(word, None)
+        if result is not None:
+            self.stats["cache_hit"] += 1
+            self.cache.move_to_end(word)
+            return result
+        self.stats["enchant"] += 1
+        result = self.enchant_check(word)
+        self.cache[word] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+
+checker = LegalityChecker(config.LEGAL_OFFLINE, config.LEGAL_CACHE_SIZE, config.LEGAL_EXTRA_WORDS)
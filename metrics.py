@@ -0,0 +1,257 @@
+"""
+运行指标：各处理阶段的耗时直方图与计数器，可导出为 Prometheus 文本格式。
+
+config.METRICS_ENABLED 为 False 时，timed 直接返回原函数，timer 返回共用的空上下文，inc 立即返回，
+热路径上几乎没有额外开销。开关在导入时读取，修改后需重启。
+指标只在事件循环线程中记录；分片模式（ENGINE_WORKERS > 0）下游戏在工作进程中处理，这里只有主进程的数据。
+"""
+import asyncio
+import logging
+import os
+import time
+import tracemalloc
+from bisect import bisect_left
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]  # (指标名, 标签, 值)
+
+# 阶段耗时的桶上界（秒），覆盖从字典查询到绘图发送
+buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+descriptions = {
+    "wordle_stage_seconds": ("histogram", "各处理阶段的耗时"),
+    "wordle_games_started_total": ("counter", "按词典统计的开局数"),
+    "wordle_guesses_total": ("counter", "按结果统计的猜测数"),
+    "wordle_timeouts_total": ("counter", "超时结束的游戏数"),
+    "wordle_active_games": ("gauge", "进行中的游戏数"),
+    "wordle_image_cache_hits_total": ("counter", "图片缓存命中次数"),
+    "wordle_image_cache_misses_total": ("counter", "图片缓存未命中次数"),
+    "wordle_image_cache_bytes": ("gauge", "图片缓存占用的字节数"),
+    "wordle_legality_checks_total": ("counter", "按来源统计的单词合法性检查次数"),
+    "wordle_process_resident_bytes": ("gauge", "进程常驻内存"),
+    "wordle_process_max_resident_bytes": ("gauge", "进程常驻内存峰值"),
+    "wordle_tracemalloc_bytes": ("gauge", "tracemalloc 记录的 Python 内存（仅在跟踪时）"),
+}
+
+
+class NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Timer(object):
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # 以异常（如 bot.finish）退出时同样计入
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(object):
+    def __init__(self):
+        self.counts = [0] * (len(buckets) + 1)  # 最后一格为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # 返回所在桶的上界，落在最后一格时为 inf
+        rank = q * self.count
+        total = 0
+        for i, n in enumerate(self.counts):
+            total += n
+            if total >= rank and n:
+                return buckets[i] if i < len(buckets) else float("inf")
+        return float("nan")
+
+
+class Metrics(object):
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[str, Histogram] = {}  # 阶段 -> 耗时
+        self.collectors: List[Callable[[], Iterable[Sample]]] = [process_samples]
+        self.null = NullTimer()
+        self.task: Optional[asyncio.Task] = None
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.histograms.get(stage, None)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, stage: str):
+        return Timer(self, stage) if self.enabled else self.null
+
+    def timed(self, stage: str):
+        """记录函数耗时的装饰器，支持协程函数；未启用时原样返回函数"""
+
+        def deco(func):
+            if not self.enabled:
+                return func
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def wrapper(*args, **kwargs):
+                    with Timer(self, stage):
+                        return await func(*args, **kwargs)
+            else:
+                @wraps(func)
+                def wrapper(*args, **kwargs):
+                    with Timer(self, stage):
+                        return func(*args, **kwargs)
+            return wrapper
+
+        return deco
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        # 导出时调用，给出当时的取值（如进行中的游戏数、缓存统计）
+        self.collectors.append(collector)
+
+    def samples(self) -> List[Sample]:
+        result = [(name, dict(labels), value) for (name, labels), value in self.counters.items()]
+        for collector in self.collectors:
+            try:
+                result.extend(collector())
+            except Exception:
+                logger.exception("收集指标失败")
+        return result
+
+    def prometheus(self) -> str:
+        families: Dict[str, List[str]] = {}
+        for name, labels, value in self.samples():
+            families.setdefault(name, []).append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for lines in families.values():
+            lines.sort()
+        if self.histograms:
+            lines = families["wordle_stage_seconds"] = []
+            for stage, histogram in sorted(self.histograms.items()):
+                total = 0
+                for i, n in enumerate(histogram.counts):
+                    total += n
+                    le = format_value(buckets[i]) if i < len(buckets) else "+Inf"
+                    lines.append(f"wordle_stage_seconds_bucket{format_labels({'stage': stage, 'le': le})} {total}")
+                lines.append(f"wordle_stage_seconds_sum{format_labels({'stage': stage})} {format_value(histogram.sum)}")
+                lines.append(f"wordle_stage_seconds_count{format_labels({'stage': stage})} {histogram.count}")
+        out = []
+        for name in sorted(families):
+            kind, description = descriptions.get(name, ("untyped", ""))
+            out.append(f"# HELP {name} {description}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(families[name])
+        return "\n".join(out) + "\n"
+
+    def summary(self) -> str:
+        """供管理员指令查看的简要文本"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for name, labels, value in self.samples():
+            totals.setdefault(name, {})[",".join(labels.values())] = value
+
+        def line(title: str, name: str) -> str:
+            values = totals.get(name, {})
+            return f"{title}：" + ("，".join(f"{k or '共'} {format_value(v)}" for k, v in sorted(values.items())) or "0")
+
+        lines = [
+            line("进行中", "wordle_active_games"),
+            line("开局", "wordle_games_started_total"),
+            line("猜测", "wordle_guesses_total"),
+            line("超时", "wordle_timeouts_total"),
+            line("合法性检查", "wordle_legality_checks_total"),
+        ]
+        hits = totals.get("wordle_image_cache_hits_total", {}).get("", 0)
+        misses = totals.get("wordle_image_cache_misses_total", {}).get("", 0)
+        if hits + misses:
+            lines.append(f"图片缓存命中率：{hits / (hits + misses):.1%}")
+        memory = totals.get("wordle_process_resident_bytes", {}).get("", None)
+        if memory is not None:
+            lines.append(f"内存：{memory / 1048576:.1f}MB")
+        if self.histograms:
+            lines.append("耗时（次数 p50/p99，毫秒）：")
+            for stage, histogram in sorted(self.histograms.items()):
+                p50, p99 = histogram.quantile(0.5) * 1e3, histogram.quantile(0.99) * 1e3
+                lines.append(f"  {stage} {histogram.count} {p50:g}/{p99:g}")
+        return "\n".join(lines)
+
+    def start_export(self, path: Path, interval: float):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.export(path, interval))
+
+    async def export(self, path: Path, interval: float):
+        # 定期整体替换文件，供 node_exporter 的 textfile collector 等读取
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, write_atomic, path, self.prometheus())
+            except Exception:
+                logger.exception("导出指标失败")
+            await asyncio.sleep(interval)
+
+
+def write_atomic(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def process_samples() -> List[Sample]:
+    samples = []
+    try:
+        with open("/proc/self/statm") as f:
+            samples.append(("wordle_process_resident_bytes", {}, int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")))
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Linux 下 ru_maxrss 的单位为 KB
+        samples.append(("wordle_process_max_resident_bytes", {}, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        samples.append(("wordle_tracemalloc_bytes", {"kind": "current"}, current))
+        samples.append(("wordle_tracemalloc_bytes", {"kind": "peak"}, peak))
+    return samples
+
+
+metrics = Metrics(config.METRICS_ENABLED)
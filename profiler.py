@@ -0,0 +1,165 @@
+"""
+按需的性能与内存分析，供管理员在不重启的情况下查看插件在忙什么。
+
+sample：后台线程每隔 interval 秒读取所有线程的调用栈（sys._current_frames），
+只保留经过本插件代码的栈，因此同时覆盖事件循环线程中的 on_message、handle_wordle
+与绘图池线程中的 Wordle.draw；结果写为 collapsed stack 格式，可直接交给 flamegraph.pl 或 speedscope。
+进程池绘图（RENDER_EXECUTOR = "process"）与分片模式的工作进程不在采样范围内。
+
+memory：开启 tracemalloc，比较窗口开始与结束时的快照，列出增长最多的分配位置。
+PIL 图片的像素在 C 层分配，tracemalloc 看不到，只能看到 Python 对象（如词库、文字块的包装对象）。
+
+两者都只在窗口期内运行，平时没有任何线程或钩子。
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import List, Tuple
+
+from . import config
+
+package_dir = str(Path(__file__).parent) + os.sep
+
+
+class ProfilerBusy(Exception):
+    """已有分析在进行中"""
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(object):
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()  # collapsed stack -> 采样次数
+        self.samples = 0  # 所有线程、所有采样轮次的栈数，含未经过插件的栈
+        self.ours: set = set()  # 插件中的函数
+        self.stopped = threading.Event()
+
+    def collect(self, ident: int, names: dict):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == ident:
+                continue
+            self.samples += 1
+            stack: List[str] = []
+            ours = False
+            while frame is not None:
+                name = frame_name(frame)
+                if frame.f_code.co_filename.startswith(package_dir):
+                    ours = True
+                    self.ours.add(name)
+                stack.append(name)
+                frame = frame.f_back
+            if ours:
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def run(self):
+        ident = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.collect(ident, names)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        # 按包含时间排序的插件函数（递归时同一栈中只计一次）
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = set(stack.split(";")[1:])
+            for name in frames:
+                inclusive[name] += count
+        return [(name, count) for name, count in inclusive.most_common() if name in self.ours][:n]
+
+
+class Profiler(object):
+    """同一时间只允许一项分析"""
+
+    def __init__(self, directory: Path, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self.running = False
+
+    def output(self, kind: str, suffix: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory / f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.{suffix}"
+
+    def acquire(self):
+        if self.running:
+            raise ProfilerBusy()
+        self.running = True
+
+    async def sample(self, seconds: float) -> Tuple[Path, str]:
+        """采样 seconds 秒，返回报告文件与简要文本"""
+        self.acquire()
+        try:
+            sampler = StackSampler(self.interval)
+            thread = threading.Thread(target=sampler.run, name="wordle-profiler", daemon=True)
+            thread.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stopped.set()
+                thread.join()
+            path = self.output("profile", "collapsed")
+            lines = "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+            await asyncio.get_running_loop().run_in_executor(None, path.write_text, lines, "utf-8")
+            ours = sum(sampler.stacks.values())
+            msg = [f"采样 {seconds:g} 秒，共 {sampler.samples} 个线程栈，其中 {ours} 个经过本插件"]
+            for name, count in sampler.top(8) if ours else []:
+                msg.append(f"{count / ours:6.1%} {name}")
+            return path, "\n".join(msg)
+        finally:
+            self.running = False
+
+    async def memory(self, seconds: float, frames: int = 5, limit: int = 50) -> Tuple[Path, str]:
+        """比较 seconds 秒前后的 tracemalloc 快照，返回报告文件与增长最多的几项"""
+        self.acquire()
+        started = not tracemalloc.is_tracing()
+        try:
+            if started:
+                tracemalloc.start(frames)
+            loop = asyncio.get_running_loop()
+            before = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+            await asyncio.sleep(seconds)
+            after = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+            if started:
+                tracemalloc.stop()
+                started = False
+            diff = await loop.run_in_executor(None, compare_snapshots, before, after)
+            path = self.output("memory", "txt")
+            report = [f"{stat.size_diff:+d} B  {stat.count_diff:+d} 个  共 {stat.size} B\n" + "\n".join(
+                f"    {line}" for line in stat.traceback.format()
+            ) for stat in diff[:limit]]
+            await loop.run_in_executor(None, path.write_text, "\n".join(report) + "\n", "utf-8")
+            total = sum(stat.size_diff for stat in diff)
+            msg = [f"{seconds:g} 秒内 Python 内存变化 {total / 1024:+.1f}KB，增长最多的位置："]
+            for stat in diff[:5]:
+                frame = stat.traceback[-1] if stat.traceback else None  # 最内层调用
+                where = f"{Path(frame.filename).name}:{frame.lineno}" if frame else "?"
+                msg.append(f"{stat.size_diff / 1024:+8.1f}KB {where}")
+            return path, "\n".join(msg)
+        finally:
+            if started:
+                tracemalloc.stop()
+            self.running = False
+
+
+def compare_snapshots(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[tracemalloc.StatisticDiff]:
+    # 忽略 tracemalloc 自身与导入机制的分配
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ]
+    before, after = before.filter_traces(filters), after.filter_traces(filters)
+    return after.compare_to(before, "traceback")
+
+
+profiler = Profiler(Path(__file__).parent / config.PROFILE_DIR, config.PROFILE_INTERVAL)
@@ -0,0 +1,70 @@
+import asyncio
+import base64
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Optional
+
+from . import config
+from .image_files import image_files
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RenderBusy(Exception):
+    """等待绘图的任务已达上限"""
+
+
+def encode_image(render: Callable[[], BytesIO]) -> str:
+    data = render().getvalue()
+    if image_files is not None:
+        try:
+            return image_files.store(data, config.IMAGE_FORMAT)
+        except OSError:
+            logger.exception("写入图片文件失败，改用 base64 发送")
+    return 'base64://' + base64.b64encode(data).decode()
+
+
+class RenderPool(object):
+    """在线程池/进程池中绘图并编码，限制同时在途的任务数"""
+
+    def __init__(self, executor: str, workers: int, queue_size: int):
+        self.executor_type = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor: Optional[Executor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+
+    def get_executor(self) -> Executor:
+        if self.executor is None:
+            if self.executor_type == "process":
+                self.executor = ProcessPoolExecutor(self.workers)
+            else:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="wordle-render")
+        return self.executor
+
+    async def render(self, render: Callable[[], BytesIO]) -> str:
+        # render 需可在池中执行，进程池时还需可被 pickle（如 Wordle 的绑定方法、functools.partial）
+        if self.pending >= self.workers + self.queue_size:
+            raise RenderBusy()
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.workers)
+        self.pending += 1
+        try:
+            # 含等待空闲线程/进程的时间
+            with metrics.timer("render"):
+                async with self.slots:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self.get_executor(), encode_image, render)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+render_pool = RenderPool(config.RENDER_EXECUTOR, config.RENDER_WORKERS, config.RENDER_QUEUE_SIZE)
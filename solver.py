@@ -0,0 +1,190 @@
+"""
+“最佳下一步”提示：按词典与单词长度预先计算 (猜测词 × 答案) 的反馈矩阵，
+再按信息熵挑选最能缩小候选范围的猜测词。需要 numpy，未安装时不可用。
+
+反馈编码与 Constraints 一致：每个位置 0=灰、1=黄、2=绿，整体编码为 sum(p[j] * 3**j)。
+矩阵中存放的是稠密化后的反馈编号（codes[编号] 为原始编码），以缩小矩阵的元素类型。
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+np = None  # 首次使用时才导入 numpy
+
+from . import config
+from .word_index import get_word_index, dic_list, ALL_WORDS
+
+cache_dir = Path(__file__).parent / config.SOLVER_CACHE_DIR
+chunk_rows = 256  # 计算矩阵时每批处理的猜测词数
+max_cells = 1 << 20  # 计算信息熵时每批排序的单元数上限，也是稠密化查找表的大小上限
+
+
+def available() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def encode(words: Sequence[str]) -> "np.ndarray":
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1) - ord("a")
+
+
+def feedback(guesses: "np.ndarray", answers: "np.ndarray") -> "np.ndarray":
+    """guesses (G, L)、answers (A, L) 的字母编号 -> (G, A) 的原始反馈编码，重复字母规则同 Wordle.get_color"""
+    length = answers.shape[1]
+    green = guesses[:, None, :] == answers[None, :, :]  # (G, A, L)
+    # 答案中未被绿色占用的各字母数量
+    remaining = np.zeros((len(guesses), len(answers), 26), dtype=np.int8)
+    for j in range(length):
+        remaining[:, np.arange(len(answers)), answers[:, j]] += ~green[:, :, j]
+    code = np.zeros((len(guesses), len(answers)), dtype=np.int32)
+    rows = np.arange(len(guesses))[:, None]
+    cols = np.arange(len(answers))[None, :]
+    for j in range(length):
+        letter = guesses[:, j][:, None]
+        yellow = ~green[:, :, j] & (remaining[rows, cols, letter] > 0)
+        remaining[rows, cols, letter] -= yellow
+        code += (green[:, :, j] * 2 + yellow) * 3 ** j
+    return code
+
+
+def pattern_code(pattern: bytes) -> int:
+    return sum(p * 3 ** j for j, p in enumerate(pattern))
+
+
+def dense_matrix(letters: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """逐批计算反馈并就地换成稠密编号，不保留完整的原始编码矩阵，也不对它整体排序"""
+    n, length = letters.shape
+    lookup = np.full(3 ** length, -1, dtype=np.int32)  # 原始编码 -> 稠密编号，按出现顺序分配
+    codes: List["np.ndarray"] = []
+    count = 0
+    matrix = np.empty((n, n), dtype=np.uint16)
+    for i in range(0, n, chunk_rows):
+        raw = feedback(letters[i:i + chunk_rows], letters)
+        new = np.unique(raw)
+        new = new[lookup[new] < 0]
+        lookup[new] = np.arange(count, count + len(new))
+        count += len(new)
+        codes.append(new)
+        if count > 65536 and matrix.dtype == np.uint16:
+            matrix = matrix.astype(np.uint32)
+        matrix[i:i + chunk_rows] = lookup[raw]
+    return matrix, np.concatenate(codes)
+
+
+class Solver(object):
+    def __init__(self, words: List[str], matrix: "np.ndarray", codes: "np.ndarray", opening: int):
+        self.words = words
+        self.letters = encode(words)
+        self.position = {w: i for i, w in enumerate(words)}
+        self.matrix = matrix  # (N, N) 稠密反馈编号
+        self.codes = codes  # 稠密编号 -> 原始编码
+        self.opening = opening  # 尚未猜测时的最佳猜测词序号
+
+    @classmethod
+    def build(cls, words: List[str]) -> "Solver":
+        letters = encode(words)
+        n, length = letters.shape
+        if 3 ** length > max_cells:
+            # 单词很长时词数很少，整体去重比 3**length 大小的查找表更省内存
+            raw = feedback(letters, letters)
+            codes, dense = np.unique(raw, return_inverse=True)
+            matrix = dense.reshape(raw.shape).astype(np.uint16 if len(codes) <= 65536 else np.uint32)
+        else:
+            matrix, codes = dense_matrix(letters)
+        if len(codes) <= 256:
+            matrix = matrix.astype(np.uint8)
+        solver = cls(words, matrix, codes.astype(np.int32), 0)
+        solver.opening = int(np.argmax(solver.entropy(np.ones(n, dtype=bool))))
+        return solver
+
+    def entropy(self, mask: "np.ndarray") -> "np.ndarray":
+        # 每个猜测词在当前候选答案上的反馈分布熵：各行排序后相同编号连成一段，段长即该反馈的次数
+        total = int(mask.sum())
+        rows = max(1, min(len(self.words), max_cells // total))
+        result = np.empty(len(self.words))
+        for start in range(0, len(self.words), rows):
+            part = np.sort(self.matrix[start:start + rows][:, mask], axis=1)
+            first = np.ones(part.shape, dtype=bool)
+            first[:, 1:] = part[:, 1:] != part[:, :-1]
+            begin = np.flatnonzero(first)
+            p = np.diff(np.append(begin, part.size)) / total
+            result[start:start + rows] = np.bincount(begin // total, weights=-p * np.log2(p), minlength=len(part))
+        return result
+
+    def candidates(self, guesses: List[str], patterns: List[bytes]) -> "np.ndarray":
+        mask = np.ones(len(self.words), dtype=bool)
+        for guess, pattern in zip(guesses, patterns):
+            i = self.position.get(guess, None)
+            if i is not None:
+                row = self.codes[self.matrix[i]]
+            else:
+                row = feedback(encode([guess]), self.letters)[0]
+            mask &= row == pattern_code(pattern)
+        return mask
+
+    def best_guess(self, guesses: List[str], patterns: List[bytes]) -> Tuple[Optional[str], int]:
+        """返回 (建议的猜测词, 剩余候选数)"""
+        if not guesses:
+            return self.words[self.opening], len(self.words)
+        mask = self.candidates(guesses, patterns)
+        remaining = int(mask.sum())
+        if remaining == 0:
+            return None, 0
+        if remaining <= 2:
+            return self.words[int(np.argmax(mask))], remaining
+        # 熵相同时优先选仍可能是答案的词
+        score = self.entropy(mask) + mask * 1e-6
+        for guess in guesses:
+            if guess in self.position:
+                score[self.position[guess]] = -1
+        return self.words[int(np.argmax(score))], remaining
+
+
+_solvers: Dict[Tuple[str, int], Solver] = {}
+_lock = threading.Lock()
+
+
+def dictionary_words(dic_name: str, length: int) -> List[str]:
+    return sorted({w.lower() for w in get_word_index(dic_name).words(length) if w.isalpha()})
+
+
+def load_solver(dic_name: str, length: int) -> Solver:
+    path = cache_dir / f"{dic_name}_{length}.npz"
+    words = dictionary_words(dic_name, length)
+    if path.exists():
+        with np.load(path) as data:
+            if list(data["words"]) == words:
+                return Solver(words, data["matrix"], data["codes"], int(data["opening"]))
+    solver = Solver.build(words)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # 分片模式下各工作进程可能同时计算同一矩阵，临时文件按进程区分（np.savez 要求以 .npz 结尾）
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, words=np.array(words), matrix=solver.matrix, codes=solver.codes, opening=solver.opening)
+    tmp.replace(path)
+    return solver
+
+
+def get_solver(dic_name: str, length: int) -> Solver:
+    key = (dic_name, length)
+    solver = _solvers.get(key, None)
+    if solver is None:
+        with _lock:
+            solver = _solvers.get(key, None)
+            if solver is None:
+                solver = load_solver(dic_name, length)
+                _solvers[key] = solver
+    return solver
+
+
+def suggest_next(dic_name: str, length: int, guesses: List[str], patterns: List[bytes]) -> Tuple[Optional[str], int]:
+    # 词典未知（如旧版本保存的游戏）时使用全量词表
+    if dic_name not in dic_list:
+        dic_name = ALL_WORDS
+    return get_solver(dic_name, length).best_guess(guesses, patterns)
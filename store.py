@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 进行中的游戏：结束的游戏直接删除，表中只保留仍可恢复的记录
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    cid TEXT PRIMARY KEY,
+    word TEXT NOT NULL,
+    meaning TEXT NOT NULL,
+    dic TEXT NOT NULL DEFAULT '',
+    guesses TEXT NOT NULL,
+    deadline REAL NOT NULL,
+    target TEXT NOT NULL
+)
+"""
+
+
+class GameStore(object):
+    """游戏状态的 SQLite 快照
+
+    save/delete 只把最新状态放入待写字典（同一会话多次修改只保留最后一次），
+    由后台线程定期在一个事务中批量写入，处理消息时不等待磁盘。
+    """
+
+    def __init__(self, path: Path, flush_interval: float):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending: Dict[str, Optional[tuple]] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread: Optional[threading.Thread] = None
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(SCHEMA)
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(games)")]
+            if "dic" not in columns:
+                self.conn.execute("ALTER TABLE games ADD COLUMN dic TEXT NOT NULL DEFAULT ''")
+        return self.conn
+
+    def save(self, cid: str, word: str, meaning: str, dic: str, guesses: List[str], deadline: float, target: dict):
+        row = (cid, word, meaning, dic, ",".join(guesses), deadline, json.dumps(target))
+        with self.lock:
+            self.pending[cid] = row
+        self.start()
+
+    def delete(self, cid: str):
+        with self.lock:
+            self.pending[cid] = None
+        self.start()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        upserts = [row for row in pending.values() if row is not None]
+        deletes = [(cid,) for cid, row in pending.items() if row is None]
+        try:
+            conn = self.connect()
+            with conn:
+                if upserts:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO games (cid, word, meaning, dic, guesses, deadline, target) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        upserts,
+                    )
+                if deletes:
+                    conn.executemany("DELETE FROM games WHERE cid = ?", deletes)
+        except sqlite3.Error:
+            # 写入失败时放回待写字典，期间更新过的会话以新状态为准
+            with self.lock:
+                for cid, row in pending.items():
+                    self.pending.setdefault(cid, row)
+            raise
+
+    def load(self) -> List[Tuple[str, str, str, str, List[str], float, dict]]:
+        rows = self.connect().execute(
+            "SELECT cid, word, meaning, dic, guesses, deadline, target FROM games ORDER BY deadline"
+        ).fetchall()
+        return [(cid, word, meaning, dic, guesses.split(",") if guesses else [], deadline, json.loads(target))
+                for cid, word, meaning, dic, guesses, deadline, target in rows]
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="wordle-store", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
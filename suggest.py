@@ -0,0 +1,97 @@
+import threading
+from operator import ne
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .utils import get_word_list
+from .metrics import metrics
+
+max_distance = 2  # 候选词与输入最多相差的字母数
+
+
+def _cuts(length: int) -> List[Tuple[int, int]]:
+    # 把单词切成 max_distance + 1 段：相差不超过 max_distance 个字母时，至少有一段完全相同
+    n = max_distance + 1
+    bounds = [length * i // n for i in range(n + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(n)]
+
+
+class _Bucket(object):
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        self.lower = [w.lower() for w in self.words]
+        self.cuts = _cuts(len(self.words[0])) if self.words else []
+        self.segments: List[Dict[str, List[int]]] = [{} for _ in self.cuts]
+        # 删去一个字母后的形式：等长的两个词相差一处替换或一增一删（如 madut 与 adult）时，必有一个相同的形式
+        self.deletions: Dict[str, List[int]] = {}
+        for i, word in enumerate(self.lower):
+            for seg, (a, b) in zip(self.segments, self.cuts):
+                seg.setdefault(word[a:b], []).append(i)
+            for j in range(len(word)):
+                self.deletions.setdefault(word[:j] + word[j + 1:], []).append(i)
+
+    def candidates(self, word: str) -> Dict[int, int]:
+        # 候选 -> 与输入相差的字母数（一增一删计为 2）
+        ids: Set[int] = set()
+        for seg, (a, b) in zip(self.segments, self.cuts):
+            ids.update(seg.get(word[a:b], ()))
+        found = {}
+        for i in ids:
+            distance = sum(map(ne, word, self.lower[i]))
+            if distance <= max_distance:
+                found[i] = distance
+        for j in range(len(word)):
+            for i in self.deletions.get(word[:j] + word[j + 1:], ()):
+                found.setdefault(i, 2)
+        return found
+
+
+class SuggestIndex(object):
+    """非法单词的“您是不是想说”：按长度分桶的分段索引
+
+    先用分段精确匹配取出与输入相差不超过 max_distance 个字母（替换、相邻交换）的候选，
+    加上删去一个字母后相同（一增一删）的候选，再对全部候选计算与 process.extractOne 相同的 WRatio 相似度；
+    没有候选时不给出联想：对整桶调用 extractOne 需要上百毫秒，且在事件循环中执行。
+    """
+
+    def __init__(self):
+        self.words = get_word_list()
+        self.buckets: Dict[int, _Bucket] = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, length: int) -> Optional[_Bucket]:
+        bucket = self.buckets.get(length, None)
+        if bucket is None:
+            words = self.words.words(length)
+            if not words:
+                return None
+            with self.lock:
+                bucket = self.buckets.setdefault(length, _Bucket(words))
+        return bucket
+
+    @metrics.timed("suggest")
+    def suggest(self, word: str) -> Optional[Tuple[str, int]]:
+        from fuzzywuzzy import fuzz  # 首次需要联想时才导入
+
+        bucket = self.get_bucket(len(word))
+        if bucket is None:
+            return None
+        query = word.lower()
+        nearest = bucket.candidates(query)
+        if not nearest:
+            return None
+        # 相似度最高者优先，相同时取字母差异少的，再相同时取词表中靠前的
+        score, _, _, i = max((fuzz.WRatio(query, bucket.lower[i]), -distance, -i, i) for i, distance in nearest.items())
+        return bucket.words[i], score
+
+    def meaning(self, word: str) -> str:
+        return self.words.meaning(word)
+
+
+_index: Optional[SuggestIndex] = None
+
+
+def get_suggest_index() -> SuggestIndex:
+    global _index
+    if _index is None:
+        _index = SuggestIndex()
+    return _index
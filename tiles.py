@@ -0,0 +1,88 @@
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageDraw
+from PIL.Image import Image as IMG
+from PIL.ImageFont import FreeTypeFont
+
+Color = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=None)
+def build_palette(pairs: Tuple[Tuple[Color, Color], ...], steps: int = 32) -> Tuple[Color, ...]:
+    # 每组 (底色, 文字色) 之间取若干级渐变，覆盖文字抗锯齿产生的中间色
+    colors: List[Color] = []
+    for base, fore in pairs:
+        for i in range(steps):
+            color = tuple(round(b + (f - b) * i / (steps - 1)) for b, f in zip(base, fore))
+            if color not in colors:
+                colors.append(color)
+    if len(colors) > 256:
+        raise ValueError("调色板颜色数超过 256")
+    return tuple(colors)
+
+
+class TileAtlas(object):
+    """进程内共享的文字块缓存，首次用到某种 (颜色, 字母) 组合时才绘制
+
+    返回的图片为共享对象，只可用于 paste，不可修改。
+    """
+
+    def __init__(self, font: FreeTypeFont, block_size: Tuple[int, int], border_width: int, palette: Optional[Tuple[Color, ...]] = None):
+        self.font = font
+        self.block_size = block_size
+        self.border_width = border_width
+        self.tiles: Dict[Tuple[Color, str, Color, Color], IMG] = {}
+        # 提供调色板时，文字块与画布均为共享同一调色板的 P 模式图片，paste 时直接复制索引
+        self.palette = palette
+        self.palette_data: List[int] = []
+        self.palette_image: Optional[IMG] = None
+        if palette:
+            self.palette_data = [v for color in palette for v in color]
+            self.palette_data += [0] * (768 - len(self.palette_data))
+            self.palette_image = Image.new("P", (1, 1))
+            self.palette_image.putpalette(self.palette_data)
+
+    def new_canvas(self, size: Tuple[int, int], color: Color) -> IMG:
+        if self.palette is None:
+            return Image.new("RGB", size, color)
+        canvas = Image.new("P", size, self.palette.index(color))
+        canvas.putpalette(self.palette_data)
+        return canvas
+
+    def render(self, color: Color, letter: str, font_color: Color, border_color: Color) -> IMG:
+        block = Image.new("RGB", self.block_size, border_color)
+        inner_w = self.block_size[0] - self.border_width * 2
+        inner_h = self.block_size[1] - self.border_width * 2
+        inner = Image.new("RGB", (inner_w, inner_h), color)
+        block.paste(inner, (self.border_width, self.border_width))
+        if len(letter):
+            draw = ImageDraw.Draw(block)
+            letter_size = self.font.getsize(letter)
+            x = (self.block_size[0] - letter_size[0]) / 2
+            y = (self.block_size[1] - letter_size[1]) / 2
+            draw.text((x, y), letter, font=self.font, fill=font_color)
+        if self.palette_image is not None:
+            block = block.quantize(palette=self.palette_image, dither=Image.Dither.NONE)
+        return block
+
+    def get(self, color: Color, letter: str, font_color: Color, border_color: Color) -> IMG:
+        key = (color, letter.upper(), font_color, border_color)
+        tile = self.tiles.get(key, None)
+        if tile is None:
+            tile = self.render(*key)
+            self.tiles[key] = tile
+        return tile
+
+
+_atlases: Dict[tuple, TileAtlas] = {}
+_lock = threading.Lock()
+
+
+def get_atlas(font: FreeTypeFont, block_size: Tuple[int, int], border_width: int, palette: Optional[Tuple[Color, ...]] = None) -> TileAtlas:
+    key = (id(font), block_size, border_width, palette)
+    atlas = _atlases.get(key, None)
+    if atlas is None:
+        with _lock:
+            atlas = _atlases.setdefault(key, TileAtlas(font, block_size, border_width, palette))
+    return atlas
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TimeoutSweeper(object):
+    """所有游戏共用的超时检查
+
+    每条消息只刷新会话的最后活动时间；由一个周期任务批量回收超时的会话。
+    超时时长固定，因此按刷新顺序排列的 OrderedDict 同时也按截止时间有序，
+    每次检查只需从头部取出已超时的会话。
+    """
+
+    def __init__(self, timeout: float, interval: float, on_expire: Callable[[str, Any], Awaitable]):
+        self.timeout = timeout
+        self.interval = interval
+        self.on_expire = on_expire
+        self.deadlines: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.task: Optional[asyncio.Task] = None
+
+    def touch(self, cid: str, context: Any):
+        self.deadlines[cid] = (time.monotonic() + self.timeout, context)
+        self.deadlines.move_to_end(cid)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def restore(self, cid: str, context: Any, remaining: float):
+        # 仅用于启动时恢复游戏：需按剩余时间从小到大调用，且早于任何 touch
+        self.deadlines[cid] = (time.monotonic() + max(0.0, remaining), context)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def discard(self, cid: str):
+        self.deadlines.pop(cid, None)
+
+    def expired(self) -> List[Tuple[str, Any]]:
+        now = time.monotonic()
+        expired = []
+        while self.deadlines:
+            cid, (deadline, context) = next(iter(self.deadlines.items()))
+            if deadline > now:
+                break
+            self.deadlines.popitem(last=False)
+            expired.append((cid, context))
+        return expired
+
+    async def run(self):
+        while self.deadlines:
+            await asyncio.sleep(self.interval)
+            for cid, context in self.expired():
+                try:
+                    await self.on_expire(cid, context)
+                except Exception:
+                    logger.exception(f"结束超时游戏 {cid} 失败")
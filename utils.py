@@ -1,47 +1,50 @@
-import json
-import random
-import enchant
 from io import BytesIO
 from pathlib import Path
-from typing import Tuple, Dict
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 from PIL import ImageFont
 from PIL.Image import Image as IMG
 from PIL.ImageFont import FreeTypeFont
 
+from . import config
+from .word_index import dic_list, get_word_index, WordIndex, ALL_WORDS
+from .wordpack import WordPack
+from .legality import checker
+from .candidates import get_candidate_index
+from .metrics import metrics
+
 data_dir = Path(__file__).parent / "resources"
 fonts_dir = data_dir / "fonts"
 words_dir = data_dir / "words"
 
-dic_list = [f.stem for f in words_dir.iterdir() if f.suffix == ".json"]
-
-en_dict = enchant.Dict("en")
-en_us_dict = enchant.Dict("en_US")
-
 
+@metrics.timed("legal_word")
 def legal_word(word: str) -> bool:
-    return en_dict.check(word) or en_us_dict.check(word)
+    return checker.check(word)
 
 
-def random_word(dic_name: str = "CET4", word_length: int = 5) -> Tuple[str, str]:
-    with (words_dir / f"{dic_name}.json").open("r", encoding="utf-8") as f:
-        data: dict = json.load(f)
-        data = {k: v for k, v in data.items() if len(k) == word_length}
-        word = random.choice(list(data.keys()))
-        meaning = data[word]["中释"].strip()
-        return word, meaning
+def random_word(dic_name: str = "CET4", word_length: int = 5, difficulty: str = "") -> Optional[Tuple[str, str]]:
+    # 指定难度时在候选词位图上筛选，没有符合条件的单词时返回 None
+    if difficulty:
+        index = get_candidate_index(dic_name, word_length)
+        return index.pick(index.difficulty_mask(difficulty))
+    return get_word_index(dic_name).random_word(word_length)
 
 
-def get_word_list() -> dict:
-    with (words_dir / f"words_by_len.json").open("r", encoding="utf-8") as fp:
-        return json.load(fp)
+def get_word_list() -> Union[WordPack, WordIndex]:
+    return get_word_index(ALL_WORDS)
 
 
-def save_png(frame: IMG) -> BytesIO:
+def save_image(frame: IMG) -> BytesIO:
+    # 按配置输出，P 模式图片保持调色板直接编码
     output = BytesIO()
-    frame = frame.convert("RGBA")
-    frame.save(output, format="png")
+    if config.IMAGE_FORMAT == "webp":
+        frame.save(output, format="webp", lossless=config.WEBP_LOSSLESS, quality=config.WEBP_QUALITY)
+    else:
+        frame.save(output, format="png", compress_level=config.PNG_COMPRESS_LEVEL)
     return output
 
 
+@lru_cache(maxsize=None)
 def load_font(name: str, fontsize: int) -> FreeTypeFont:
     return ImageFont.truetype(str(fonts_dir / name), fontsize, encoding="utf-8")
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+
+from . import solver
+from .word_index import dic_list, get_word_index, ALL_WORDS
+from .legality import checker
+from .suggest import get_suggest_index
+from .data_source import get_theme
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """预加载首局游戏会用到的资源；各资源本身均按需加载，提前调用只是免去首局的等待"""
+    for dic_name in dic_list + [ALL_WORDS]:
+        get_word_index(dic_name)
+    checker.load()
+    get_suggest_index()
+    import fuzzywuzzy.fuzz  # noqa: F401
+    get_theme()
+    solver.available()
+
+
+async def warm_up_later(delay: float):
+    await asyncio.sleep(delay)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, warm_up)
+    except Exception:
+        logger.exception("预加载失败")
@@ -0,0 +1,76 @@
+import json
+import random
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from .wordpack import WordPack, ensure_pack
+
+data_dir = Path(__file__).parent / "resources"
+words_dir = data_dir / "words"
+
+ALL_WORDS = "words_by_len"  # 全量词表，仅用于联想，不作为出题词典
+
+
+class WordIndex(object):
+    """单个词典的常驻索引：单词按长度分桶，释义按单词查找"""
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.by_len: Dict[int, List[str]] = {}
+        self.meanings: Dict[str, str] = {}
+        self.english: Dict[str, str] = {}
+        if name == ALL_WORDS:
+            # words_by_len.json: {"长度": {单词: 释义}}
+            for length, words in data.items():
+                self.by_len[int(length)] = list(words.keys())
+                self.meanings.update(words)
+        else:
+            # 词典: {单词: {"中释": ..., "英释": ...}}
+            for word, info in data.items():
+                self.by_len.setdefault(len(word), []).append(word)
+                self.meanings[word] = info["中释"]
+                self.english[word] = info.get("英释", "")
+
+    def words(self, length: int) -> List[str]:
+        return self.by_len.get(length, [])
+
+    def meaning(self, word: str) -> str:
+        return self.meanings[word].strip()
+
+    def english_meaning(self, word: str) -> str:
+        return self.english.get(word, "").strip()
+
+    def random_word(self, length: int) -> Tuple[str, str]:
+        word = random.choice(self.by_len[length])
+        return word, self.meaning(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.meanings
+
+
+_indexes: Dict[str, Union[WordPack, WordIndex]] = {}
+_lock = threading.Lock()
+
+dic_list = [f.stem for f in words_dir.iterdir() if f.suffix == ".json" and f.stem != ALL_WORDS]
+
+
+def load_index(dic_name: str) -> Union[WordPack, WordIndex]:
+    # 优先使用 mmap 词库文件，无法生成（如只读部署）或文件损坏时退回解析 json
+    try:
+        return WordPack(dic_name, ensure_pack(dic_name))
+    except (OSError, ValueError, struct.error):
+        with (words_dir / f"{dic_name}.json").open("r", encoding="utf-8") as f:
+            return WordIndex(dic_name, json.load(f))
+
+
+def get_word_index(dic_name: str) -> Union[WordPack, WordIndex]:
+    index = _indexes.get(dic_name, None)
+    if index is None:
+        with _lock:
+            index = _indexes.get(dic_name, None)
+            if index is None:
+                index = load_index(dic_name)
+                _indexes[dic_name] = index
+    return index
@@ -0,0 +1,170 @@
+"""
+紧凑的二进制词库格式（.wpk），读取时直接 mmap，释义按需解码。
+
+文件布局（小端序）：
+    header      <4sIII      魔数 b"WPK1"、长度桶数量、单词总数、单词区字节数
+    buckets     <IIII * n   单词长度、该长度单词数、首个单词的全局序号、单词区内偏移
+    words       每个桶内按字典序排列的定长 ASCII 单词，紧密拼接
+    offsets     <I * (2 * 单词总数 + 1)   释义区偏移，第 i 个单词的中释为 [2i, 2i+1)，英释为 [2i+1, 2i+2)
+    blob        UTF-8 编码的释义
+
+生成：python wordpack.py [词典名 ...]，默认转换 resources/words 下全部词典。
+"""
+import bisect
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+MAGIC = b"WPK1"
+HEADER = struct.Struct("<4sIII")
+BUCKET = struct.Struct("<IIII")
+OFFSET = struct.Struct("<I")
+
+words_dir = Path(__file__).parent / "resources" / "words"
+packs_dir = Path(__file__).parent / "resources" / "packs"
+
+
+def _entries(data: dict) -> List[Tuple[str, str, str]]:
+    # 兼容两种词库结构：{单词: {"中释", "英释"}} 与 words_by_len 的 {"长度": {单词: 释义}}
+    entries = []
+    for key, value in data.items():
+        if isinstance(value, dict) and "中释" not in value:
+            entries += [(word, meaning, "") for word, meaning in value.items()]
+        else:
+            entries.append((key, value["中释"], value.get("英释", "")))
+    return entries
+
+
+def build_pack(src: Path, dst: Path) -> None:
+    with src.open("r", encoding="utf-8") as f:
+        entries = _entries(json.load(f))
+    entries.sort(key=lambda e: (len(e[0]), e[0]))
+
+    buckets = []
+    words = bytearray()
+    offsets = [0]
+    blob = bytearray()
+    for i, (word, zh, en) in enumerate(entries):
+        if not buckets or buckets[-1][0] != len(word):
+            buckets.append([len(word), 0, i, len(words)])
+        buckets[-1][1] += 1
+        words += word.encode("ascii")
+        blob += zh.encode("utf-8")
+        offsets.append(len(blob))
+        blob += en.encode("utf-8")
+        offsets.append(len(blob))
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # 分片模式下各工作进程可能同时生成同一词库，临时文件按进程区分，避免写到一半被别人替换
+    tmp = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, len(buckets), len(entries), len(words)))
+        for bucket in buckets:
+            f.write(BUCKET.pack(*bucket))
+        f.write(words)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+    os.replace(tmp, dst)
+
+
+class _Bucket(Sequence[str]):
+    """同一长度的单词，按需从 mmap 中切片解码"""
+
+    def __init__(self, buf: mmap.mmap, start: int, length: int, count: int, first: int):
+        self.buf = buf
+        self.start = start
+        self.length = length
+        self.count = count
+        self.first = first
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        pos = self.start + i * self.length
+        return self.buf[pos:pos + self.length].decode("ascii")
+
+    def index_of(self, word: str) -> int:
+        i = bisect.bisect_left(self, word)
+        if i < self.count and self[i] == word:
+            return i
+        return -1
+
+
+class WordPack(object):
+    """mmap 读取的词库，接口与 WordIndex 一致"""
+
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        with path.open("rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_buckets, n_words, words_size = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} 不是有效的词库文件")
+        words_start = HEADER.size + BUCKET.size * n_buckets
+        self.offsets_start = words_start + words_size
+        self.blob_start = self.offsets_start + OFFSET.size * (2 * n_words + 1)
+        self.by_len: Dict[int, _Bucket] = {}
+        for i in range(n_buckets):
+            length, count, first, offset = BUCKET.unpack_from(self.buf, HEADER.size + BUCKET.size * i)
+            self.by_len[length] = _Bucket(self.buf, words_start + offset, length, count, first)
+
+    def words(self, length: int) -> Sequence[str]:
+        return self.by_len.get(length, ())
+
+    def _text(self, n: int) -> str:
+        start, end = struct.unpack_from("<II", self.buf, self.offsets_start + OFFSET.size * n)
+        return self.buf[self.blob_start + start:self.blob_start + end].decode("utf-8")
+
+    def _find(self, word: str) -> int:
+        bucket = self.by_len.get(len(word), None)
+        i = bucket.index_of(word) if bucket else -1
+        if i < 0:
+            raise KeyError(word)
+        return bucket.first + i
+
+    def meaning(self, word: str) -> str:
+        return self._text(2 * self._find(word)).strip()
+
+    def english_meaning(self, word: str) -> str:
+        return self._text(2 * self._find(word) + 1).strip()
+
+    def random_word(self, length: int) -> Tuple[str, str]:
+        word = random.choice(self.by_len[length])
+        return word, self.meaning(word)
+
+    def __contains__(self, word: str) -> bool:
+        bucket = self.by_len.get(len(word), None)
+        return bool(bucket) and bucket.index_of(word) >= 0
+
+
+def pack_path(dic_name: str) -> Path:
+    return packs_dir / f"{dic_name}.wpk"
+
+
+def ensure_pack(dic_name: str) -> Path:
+    # 词库文件缺失或比 json 旧时重新生成
+    src = words_dir / f"{dic_name}.json"
+    dst = pack_path(dic_name)
+    if not dst.exists() or dst.stat().st_mtime < src.stat().st_mtime:
+        build_pack(src, dst)
+    return dst
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or [f.stem for f in words_dir.iterdir() if f.suffix == ".json"]
+    for name in names:
+        src = words_dir / f"{name}.json"
+        build_pack(src, pack_path(name))
+        print(f"{src.name}: {src.stat().st_size} -> {pack_path(name).stat().st_size} bytes")